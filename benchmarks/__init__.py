@@ -0,0 +1,7 @@
+"""
+Benchmarks for CleverDict.  Not part of the installed package.
+
+Run from the repository root, e.g.
+
+    python -m benchmarks.bench_core --quick
+"""
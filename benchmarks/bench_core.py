@@ -0,0 +1,173 @@
+"""
+Scaling benchmarks for the core CleverDict operations, compared with a plain
+dict and types.SimpleNamespace.
+
+    python -m benchmarks.bench_core --quick
+    python -m benchmarks.bench_core --output new.json --baseline old.json
+
+Per-key operations (setattr, getattr, all_aliases, delete, update, evict,
+expire) are timed on a sample of at most SAMPLE keys of an object of the
+given size, so their per_unit time should stay flat as the size grows.
+Whole-object operations (construct, info, repr, to_dict, to_list) report
+time per item.
+"""
+
+import sys
+import time
+from types import SimpleNamespace
+
+from cleverdict import CleverDict, Expand, all_aliases
+
+from .harness import measure, parser, predict, report, result, sizes_from
+
+SAMPLE = 10_000
+
+
+def make_data(size):
+    return {f"key_{i}": i for i in range(size)}
+
+
+def sample_keys(size):
+    step = max(size // SAMPLE, 1)
+    return [f"key_{i}" for i in range(0, size, step)][:SAMPLE]
+
+
+def benchmarks(size):
+    """
+    Yields (name, impl, setup, run, units) for every benchmark at this size.
+    """
+    data = make_data(size)
+    keys = sample_keys(size)
+    updates = {k: -1 for k in keys}
+    new_keys = [f"new_{i}" for i in range(len(keys))]
+
+    def setattrs(obj):
+        for k in keys:
+            setattr(obj, k, 0)
+
+    def getattrs(obj):
+        for k in keys:
+            getattr(obj, k)
+
+    def setitems(obj):
+        for k in keys:
+            obj[k] = 0
+
+    def getitems(obj):
+        for k in keys:
+            obj[k]
+
+    def delitems(obj):
+        for k in keys:
+            del obj[k]
+
+    def delattrs(obj):
+        for k in keys:
+            delattr(obj, k)
+
+    def evicts(obj):
+        for k in new_keys:  # each deletes the least recently used item
+            obj[k] = 0
+
+    def cleverdict():
+        return CleverDict(data)
+
+    def full_cache():
+        x = CleverDict(data, maxsize=size)
+        evicts(x)  # i.e. not timing the first eviction, which indexes the aliases
+        return x
+
+    def expiring():
+        # The sample keys all expire at the same moment, allowing 10us per key to set them:
+        x = CleverDict(data)
+        del x[keys[-1]]
+        deadline = time.monotonic() + 0.05 + len(keys) * 1e-5
+        for k in keys:
+            x.set(k, 0, ttl=deadline - time.monotonic())
+        time.sleep(max(deadline - time.monotonic(), 0))
+        return x
+
+    def namespace():
+        return SimpleNamespace(**data)
+
+    # CleverDict
+    yield "construct", "CleverDict", None, lambda _: CleverDict(data), size
+    yield "setattr", "CleverDict", cleverdict, setattrs, len(keys)
+    yield "getattr", "CleverDict", cleverdict, getattrs, len(keys)
+    yield "setitem", "CleverDict", cleverdict, setitems, len(keys)
+    yield "getitem", "CleverDict", cleverdict, getitems, len(keys)
+    yield "all_aliases", "CleverDict", None, lambda _: [all_aliases(k) for k in keys], len(keys)
+    yield "delete", "CleverDict", cleverdict, delitems, len(keys)
+    yield "update", "CleverDict", cleverdict, lambda x: x.update(updates), len(keys)
+    yield "evict", "CleverDict", full_cache, evicts, len(keys)
+    yield "expire", "CleverDict", expiring, lambda x: x.expire(), len(keys)
+    yield "info", "CleverDict", cleverdict, lambda x: x.info(as_str=True), size
+    yield "repr", "CleverDict", cleverdict, repr, size
+    yield "to_dict", "CleverDict", cleverdict, lambda x: x.to_dict(), size
+    yield "to_list", "CleverDict", cleverdict, lambda x: x.to_list(), size
+
+    # Plain dict
+    yield "construct", "dict", None, lambda _: dict(data), size
+    yield "setitem", "dict", lambda: dict(data), setitems, len(keys)
+    yield "getitem", "dict", lambda: dict(data), getitems, len(keys)
+    yield "delete", "dict", lambda: dict(data), delitems, len(keys)
+    yield "update", "dict", lambda: dict(data), lambda d: d.update(updates), len(keys)
+    yield "repr", "dict", lambda: dict(data), repr, size
+    yield "to_dict", "dict", lambda: dict(data), dict, size
+    yield "to_list", "dict", lambda: dict(data), lambda d: list(d.items()), size
+
+    # SimpleNamespace
+    yield "construct", "SimpleNamespace", None, lambda _: namespace(), size
+    yield "setattr", "SimpleNamespace", namespace, setattrs, len(keys)
+    yield "getattr", "SimpleNamespace", namespace, getattrs, len(keys)
+    yield "delete", "SimpleNamespace", namespace, delattrs, len(keys)
+    yield "update", "SimpleNamespace", namespace, lambda n: vars(n).update(updates), len(keys)
+    yield "repr", "SimpleNamespace", namespace, repr, size
+    yield "to_dict", "SimpleNamespace", namespace, lambda n: dict(vars(n)), size
+    yield "to_list", "SimpleNamespace", namespace, lambda n: list(vars(n).items()), size
+
+
+def run(sizes, repeat=3, budget=10.0, verbose=True, names=None):
+    """
+    Runs every benchmark (or those in names) for every size (with Expand on
+    and off for CleverDict).
+
+    Larger sizes of a benchmark are skipped once a run is predicted (from the
+    growth observed so far) to take longer than budget seconds.
+
+    Returns
+    -------
+    list of result records (see benchmarks.harness)
+    """
+    results = []
+    history = {}
+    for size in sorted(sizes):
+        for expand in (True, False):
+            with Expand(expand):
+                for name, impl, setup, func, units in benchmarks(size):
+                    if names is not None and name not in names:
+                        continue
+                    params = {"expand": expand} if impl == "CleverDict" else {}
+                    if impl != "CleverDict" and not expand:
+                        continue  # baselines don't depend on Expand
+                    curve = history.setdefault((name, impl, expand), [])
+                    if predict(curve, size) > budget:
+                        if verbose:
+                            print(f"  skipping {name} {impl} {params} {size}", file=sys.stderr)
+                        continue
+                    seconds = measure(func, setup, repeat)
+                    curve.append((size, seconds))
+                    results.append(result(name, impl, size, seconds, units, **params))
+                    if verbose:
+                        print(f"  {name} {impl} {params} {size}: {seconds:.4f}s", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    args = parser(__doc__.splitlines()[1]).parse_args(argv)
+    results = run(sizes_from(args), args.repeat, args.budget)
+    return report(results, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Import-time benchmark for "import cleverdict", using python -X importtime.
+
+    python -m benchmarks.bench_import
+    python -m benchmarks.bench_import --runs 20 --output new.json --baseline old.json
+
+Each run is a fresh interpreter, so the result is what a CLI tool or a
+short-lived worker pays on every start.  A first, untimed run byte-compiles
+the modules (into a temporary PYTHONPYCACHEPREFIX rather than the source
+tree) so compiling isn't counted.  The script fails if the best run is over
+--import-budget milliseconds (default BUDGET_US).
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .harness import parser, report, result
+
+BUDGET_US = 20_000
+
+# Modules which "import cleverdict" must not import (they're loaded on first use):
+DEFERRED = ("inspect", "json", "datetime", "pathlib", "collections", "sqlite3", "multiprocessing")
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "cleverdict"
+
+
+def import_times(env=None):
+    """
+    Returns {module: cumulative microseconds} from one fresh "import cleverdict".
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import cleverdict"],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PACKAGE_DIR.parent,
+        env=env,
+    ).stderr
+    times = {}
+    for line in output.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, module = line.split("|")
+            try:
+                times[module.strip()] = int(cumulative)
+            except ValueError:  # the header line
+                pass
+    return times
+
+
+def measure_import(runs=5):
+    """
+    Returns (best cumulative microseconds for cleverdict, times of that run).
+    """
+    best, best_times = float("inf"), {}
+    with tempfile.TemporaryDirectory() as cache:
+        env = {**os.environ, "PYTHONPYCACHEPREFIX": cache}
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        import_times(env)  # byte-compiles everything imported
+        for _ in range(runs):
+            times = import_times(env)
+            if times["cleverdict"] < best:
+                best, best_times = times["cleverdict"], times
+    return best, best_times
+
+
+def loaded_modules():
+    """
+    Returns the names in DEFERRED which a fresh "import cleverdict" loads.
+    """
+    code = f"import cleverdict, sys; print(*[m for m in {DEFERRED!r} if m in sys.modules])"
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=PACKAGE_DIR.parent,
+    ).stdout.split()
+
+
+def main(argv=None):
+    p = parser(__doc__.splitlines()[1])
+    p.add_argument("--runs", type=int, default=10)
+    p.add_argument("--import-budget", type=float, default=BUDGET_US / 1000, help="milliseconds")
+    args = p.parse_args(argv)
+    best, times = measure_import(args.runs)
+    status = report([result("import", "cleverdict", 0, best / 1e6, 1)], args)
+    print("Slowest imports (cumulative us):")
+    for module, us in sorted(times.items(), key=lambda item: -item[1])[:10]:
+        print(f"{us:>10}  {module}")
+    if best / 1000 > args.import_budget:
+        status = 1
+        print(f"OVER BUDGET: {best / 1000:.1f} ms > {args.import_budget} ms")
+    eager = loaded_modules()
+    if eager:
+        status = 1
+        print(f"EAGER IMPORTS: {', '.join(eager)} should only be imported when first needed")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
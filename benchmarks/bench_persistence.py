@@ -0,0 +1,232 @@
+"""
+Persistence benchmarks for autosave (data and fullcopy), to_json/from_json,
+to_lines/from_lines and get_new_save_path, with memory soak runs.
+
+    python -m benchmarks.bench_persistence --quick
+    python -m benchmarks.bench_persistence --soak 100000 --output new.json --baseline old.json
+
+Besides timings (ops/sec) this reports, per autosaved mutation, the bytes
+written and the write amplification (bytes written / bytes of JSON actually
+changed), plus tracemalloc growth per mutation and peak RSS over a soak run.
+All files are written below --tmpdir (default: /dev/shm if it exists, so tmpfs).
+"""
+
+import gc
+import itertools
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+
+from cleverdict import CleverDict
+
+from .harness import measure, parser, predict, quantity, report, result, sizes_from
+
+MUTATIONS = 200
+SAVE_PATHS = 1_000
+
+
+class TmpCleverDict(CleverDict):
+    """
+    Autosaves to unique files in TmpCleverDict.directory instead of the
+    Operating System's settings folder.
+    """
+
+    directory = None
+    counter = itertools.count()
+
+    @classmethod
+    def get_new_save_path(cls):
+        return Path(cls.directory) / f"autosave-{next(cls.counter)}.json"
+
+
+def make_data(size):
+    return {f"key_{i}": f"value {i}" for i in range(size)}
+
+
+def mutate(obj, count):
+    """
+    Applies count mutations cycling through the first keys of obj (and one
+    key which is alternately deleted and recreated).
+    """
+    keys = list(itertools.islice(obj.keys(), 50))
+    for i in range(count):
+        if i % 10 == 9:
+            if "churn" in obj:
+                del obj["churn"]
+            else:
+                obj["churn"] = i
+        else:
+            obj[keys[i % len(keys)]] = i
+
+
+def benchmarks(size, directory):
+    """
+    Yields (name, params, setup, run, units) for every timing benchmark at this size.
+    """
+    data = make_data(size)
+    json_data = CleverDict(data).to_json()
+    lines = "\n".join(data.values())
+    json_file = Path(directory) / "bench.json"
+    lines_file = Path(directory) / "bench.txt"
+    json_file.write_text(json_data, encoding="utf-8")
+    lines_file.write_text(lines, encoding="utf-8")
+
+    def cleverdict():
+        return CleverDict(data)
+
+    def autosaved(fullcopy):
+        def setup():
+            x = TmpCleverDict(data)
+            x.autosave(fullcopy=fullcopy, silent=True)
+            return x
+
+        return setup
+
+    yield "to_json", {}, cleverdict, lambda x: x.to_json(), size
+    yield "to_json_file", {}, cleverdict, lambda x: x.to_json(file_path=json_file), size
+    yield "from_json", {}, None, lambda _: CleverDict.from_json(json_data), size
+    yield "from_json_file", {}, None, lambda _: CleverDict.from_json(file_path=json_file), size
+    yield "to_lines", {}, cleverdict, lambda x: x.to_lines(), size
+    yield "from_lines", {}, None, lambda _: CleverDict.from_lines(lines), size
+    yield "from_lines_file", {}, None, lambda _: CleverDict.from_lines(file_path=lines_file), size
+    for fullcopy in (False, True):
+        params = {"fullcopy": fullcopy}
+        yield "autosave", params, autosaved(fullcopy), lambda x: mutate(x, MUTATIONS), MUTATIONS
+
+
+def write_amplification(size, fullcopy):
+    """
+    Returns (bytes written per mutation, write amplification) for autosave,
+    using CleverDict's own instrumentation to count the bytes written.
+    """
+    x = TmpCleverDict(make_data(size))
+    x.autosave(fullcopy=fullcopy, silent=True)
+    stats = CleverDict.enable_instrumentation(slow_hook=None)
+    try:
+        mutate(x, MUTATIONS)
+        written = sum(
+            sample["value"]
+            for sample in stats.to_dict()["counters"].get("bytes_written", [])
+            if sample["labels"]["operation"] == "autosave"
+        )
+    finally:
+        CleverDict.disable_instrumentation()
+    changed = len(json.dumps({"key_0": MUTATIONS}))
+    return written / MUTATIONS, written / MUTATIONS / changed
+
+
+def soak(mutations, size, fullcopy):
+    """
+    Returns (tracemalloc growth per mutation, tracemalloc peak) in bytes for
+    mutations autosaved mutations of a CleverDict with size keys.
+
+    Growth is measured over the second half of the run only, so one-off
+    allocations (caches, dict resizes) don't count as a leak.
+    """
+    x = TmpCleverDict(make_data(size))
+    x.autosave(fullcopy=fullcopy, silent=True)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        mutate(x, mutations // 2)
+        gc.collect()
+        middle, _ = tracemalloc.get_traced_memory()
+        mutate(x, mutations - mutations // 2)
+        gc.collect()
+        end, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return (end - middle) / (mutations - mutations // 2), peak - start
+
+
+def peak_rss():
+    """
+    Returns the peak resident set size of this process in bytes (None if unknown).
+    """
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def run(sizes, directory, repeat=3, budget=10.0, soak_mutations=10_000, verbose=True):
+    """
+    Runs the timing, write amplification and soak benchmarks.
+
+    Returns
+    -------
+    list of result records (see benchmarks.harness)
+    """
+    TmpCleverDict.directory = directory
+    results = []
+    history = {}
+    for size in sorted(sizes):
+        for name, params, setup, func, units in benchmarks(size, directory):
+            curve = history.setdefault((name, json.dumps(params)), [])
+            if predict(curve, size) > budget:
+                if verbose:
+                    print(f"  skipping {name} {params} {size}", file=sys.stderr)
+                continue
+            seconds = measure(func, setup, repeat)
+            curve.append((size, seconds))
+            results.append(result(name, "CleverDict", size, seconds, units, **params))
+            if verbose:
+                print(f"  {name} {params} {size}: {seconds:.4f}s", file=sys.stderr)
+        for fullcopy in (False, True):
+            if predict(history[("autosave", json.dumps({"fullcopy": fullcopy}))], size) > budget:
+                continue
+            per_mutation, amplification = write_amplification(size, fullcopy)
+            results.append(
+                quantity(
+                    "autosave_bytes", "CleverDict", size, per_mutation, "bytes", fullcopy=fullcopy
+                )
+            )
+            results.append(
+                quantity(
+                    "write_amplification", "CleverDict", size, amplification, "x", fullcopy=fullcopy
+                )
+            )
+    seconds = measure(lambda _: [CleverDict.get_new_save_path() for _ in range(SAVE_PATHS)])
+    results.append(result("get_new_save_path", "CleverDict", 0, seconds, SAVE_PATHS))
+    if soak_mutations:
+        for fullcopy in (False, True):
+            growth, peak = soak(soak_mutations, min(sizes), fullcopy)
+            params = {"fullcopy": fullcopy, "mutations": soak_mutations}
+            size = min(sizes)
+            results.append(quantity("soak_growth", "CleverDict", size, growth, "bytes", **params))
+            results.append(quantity("soak_peak", "CleverDict", size, peak, "bytes", **params))
+    rss = peak_rss()
+    if rss is not None:
+        results.append(quantity("peak_rss", "process", max(sizes), rss, "bytes"))
+    return results
+
+
+def main(argv=None):
+    p = parser(__doc__.splitlines()[1])
+    p.add_argument("--tmpdir", type=Path, help="directory for files (default: tmpfs if found)")
+    p.add_argument("--soak", type=int, default=10_000, help="mutations per soak run (0: none)")
+    p.add_argument(
+        "--max-growth",
+        type=float,
+        default=16.0,
+        help="fail if a soak run retains more than this many bytes per mutation",
+    )
+    args = p.parse_args(argv)
+    tmpdir = args.tmpdir or (Path("/dev/shm") if Path("/dev/shm").is_dir() else None)
+    with tempfile.TemporaryDirectory(dir=tmpdir) as directory:
+        results = run(sizes_from(args), directory, args.repeat, args.budget, args.soak)
+    status = report(results, args)
+    for r in results:
+        if r["name"] == "soak_growth" and r["per_unit"] > args.max_growth:
+            status = 1
+            print(f"MEMORY GROWTH {r['params']}: {r['per_unit']:.1f} bytes retained per mutation")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,203 @@
+"""
+Shared helpers for the CleverDict benchmark scripts: timing, machine-readable
+results and the regression/scaling gates.
+
+Results are lists of dicts, each with at least:
+
+    name     : str    what was measured e.g. "setattr"
+    impl     : str    "CleverDict", "dict", "SimpleNamespace" ...
+    size     : int    number of keys in the object measured
+    params   : dict   any other settings e.g. {"expand": True}
+    seconds  : float  best wall-clock time of one run (None for non-timing records)
+    per_unit : float  seconds per operation (or per item for whole-object operations)
+    unit     : str    "s" for timings, otherwise what per_unit counts e.g. "bytes"
+
+Larger per_unit values are always worse, so the same gates apply to timings,
+bytes written per mutation and memory growth.
+"""
+
+import argparse
+import json
+import math
+import platform
+import sys
+import time
+from pathlib import Path
+
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+QUICK_SIZES = (100, 1_000, 10_000)
+
+
+def measure(run, setup=None, repeat=3):
+    """
+    Returns the best time (seconds) of repeat calls of run(setup()).
+
+    setup is called (untimed) before every run, so destructive benchmarks
+    such as deletes always start from fresh data.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def predict(curve, size):
+    """
+    Extrapolates the seconds a run at size will take from earlier (size, seconds)
+    measurements, assuming at least linear growth.
+    """
+    if not curve:
+        return 0.0
+    last_size, last_seconds = curve[-1]
+    exponent = 1.0
+    if len(curve) > 1:
+        (size0, seconds0), (size1, seconds1) = curve[-2:]
+        if seconds0 > 0 and seconds1 > 0:
+            exponent = max(1.0, math.log(seconds1 / seconds0) / math.log(size1 / size0))
+    return last_seconds * (size / last_size) ** exponent
+
+
+def result(name, impl, size, seconds, units, **params):
+    """
+    Returns one result record; units is the number of operations (or items) timed.
+    """
+    return {
+        "name": name,
+        "impl": impl,
+        "size": size,
+        "params": params,
+        "seconds": seconds,
+        "per_unit": seconds / max(units, 1),
+        "unit": "s",
+    }
+
+
+def quantity(name, impl, size, per_unit, unit, **params):
+    """
+    Returns a non-timing result record e.g. bytes written per mutation.
+    """
+    return {
+        "name": name,
+        "impl": impl,
+        "size": size,
+        "params": params,
+        "seconds": None,
+        "per_unit": per_unit,
+        "unit": unit,
+    }
+
+
+def result_key(record):
+    return (
+        record["name"],
+        record["impl"],
+        record["size"],
+        json.dumps(record["params"], sort_keys=True),
+    )
+
+
+def compare(results, baseline, threshold):
+    """
+    Returns (record, baseline_record, ratio) for every result whose per_unit
+    time is more than threshold times its counterpart in baseline.
+    """
+    previous = {result_key(r): r for r in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get(result_key(record))
+        if old and old["per_unit"] > 0:
+            ratio = record["per_unit"] / old["per_unit"]
+            if ratio > threshold:
+                regressions.append((record, old, ratio))
+    return regressions
+
+
+def scaling(results, threshold):
+    """
+    Returns (name, impl, params, ratio) for every benchmark whose per_unit
+    time grows by more than threshold from its smallest to its largest size.
+
+    per_unit should stay flat for linear algorithms, so a large ratio points
+    at quadratic behaviour (e.g. a delete that scans every alias).
+    """
+    curves = {}
+    for record in results:
+        curve_key = result_key(record)[:2] + result_key(record)[3:]
+        curves.setdefault(curve_key, []).append(record)
+    flagged = []
+    for (name, impl, params), curve in curves.items():
+        curve.sort(key=lambda r: r["size"])
+        if len(curve) > 1 and curve[0]["per_unit"] > 0:
+            ratio = curve[-1]["per_unit"] / curve[0]["per_unit"]
+            if ratio > threshold:
+                flagged.append((name, impl, json.loads(params), ratio))
+    return flagged
+
+
+def parser(description):
+    """
+    Returns an ArgumentParser with the options shared by all benchmark scripts.
+    """
+    p = argparse.ArgumentParser(description=description)
+    p.add_argument("--sizes", type=lambda s: [int(float(x)) for x in s.split(",")])
+    p.add_argument("--quick", action="store_true", help=f"sizes {QUICK_SIZES}")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument(
+        "--budget",
+        type=float,
+        default=10.0,
+        help="skip sizes of a benchmark predicted to take longer than this many seconds",
+    )
+    p.add_argument("--output", type=Path, help="write JSON results to this file")
+    p.add_argument("--baseline", type=Path, help="JSON results to compare against")
+    p.add_argument("--threshold", type=float, default=1.5, help="regression ratio")
+    p.add_argument("--scaling-threshold", type=float, default=5.0)
+    return p
+
+
+def sizes_from(args):
+    return args.sizes or (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+
+
+def report(results, args):
+    """
+    Prints a summary table, writes --output and applies the gates.
+
+    Returns
+    -------
+    Exit status : int
+        1 if a regression against --baseline or a scaling problem was found.
+    """
+    for r in results:
+        params = " ".join(f"{k}={v}" for k, v in r["params"].items())
+        line = f"{r['name']:<22}{r['impl']:<17}{params:<22}{r['size']:>9}"
+        if r.get("unit", "s") == "s":
+            rate = 1 / r["per_unit"] if r["per_unit"] else float("inf")
+            line += f"{r['seconds']:>12.6f}s{r['per_unit'] * 1e9:>14.1f} ns/unit{rate:>14.0f} ops/s"
+        else:
+            line += f"{r['per_unit']:>27.1f} {r['unit']}/unit"
+        print(line)
+    if args.output:
+        document = {
+            "python": sys.version,
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "results": results,
+        }
+        args.output.write_text(json.dumps(document, indent=4), encoding="utf-8")
+    status = 0
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))["results"]
+        for record, old, ratio in compare(results, baseline, args.threshold):
+            status = 1
+            print(
+                f"REGRESSION {record['name']} {record['impl']} {record['params']} "
+                f"size={record['size']}: {ratio:.2f}x worse than baseline"
+            )
+    for name, impl, params, ratio in scaling(results, args.scaling_threshold):
+        status = 1
+        print(f"SCALING {name} {impl} {params}: per-unit cost grows {ratio:.1f}x with size")
+    return status
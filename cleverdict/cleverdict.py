@@ -1,17 +1,55 @@
-import inspect
+import bisect
+import heapq
 import itertools
-import json
 import keyword
 import os
-import types
-from collections import UserDict
-from datetime import datetime
-from pathlib import Path
+import sys
+
+# The same as collections.abc, which is much slower to import:
+from _collections_abc import ItemsView, KeysView, Mapping, ValuesView
+from time import monotonic, perf_counter
+
+# Other standard library modules (inspect, json, datetime, pathlib, types,
+# warnings, collections, sqlite3 ...) are imported where first needed (and not
+# at import time) to keep "import cleverdict" fast.
 
 """
 Change log
 ==========
 
+version 1.10.0
+--------------
+Added opt-in Instrumentation (CleverDict.enable_instrumentation) for hooks,
+alias resolution, all_aliases and JSON/autosave durations and bytes written
+Added benchmarks (not installed): python -m benchmarks.bench_core / bench_persistence
+Deferred importing inspect, json, datetime, pathlib and types until first use
+AliasesDict is now a dict subclass (was UserDict) for faster alias resolution
+Attribute/item reads resolve aliases in one step; misses raise a single exception
+.get() resolves aliases e.g. x.get("_1", default)
+Writes and deletes skip calling .save/.delete when they are the default no-ops
+Added Normaliser policies (snake_case, casefold or custom) for extra aliases of new keys
+.info() runs in linear time and takes file=, max_items= and find_names=
+repr() summarises (and caches) objects with more than CleverDict.repr_limit items
+.pop(), .popitem(), .setdefault() and .clear() resolve aliases and call .delete
+Added .get_version() (bumped by every change) and .fingerprint() (incremental content hash)
+Added .cache_exports() to reuse to_json/to_dict/to_list/to_lines output until a change
+Added CleverDict.filter() for reusable, precompiled only=/ignore=/exclude= arguments
+Added .view() for a read-only, live CleverView without copying the items
+Added .slice(), .position() and to_lines(stop_key=) using an insertion-order index
+Added secondary value indexes: .create_index(), .find(), .find_range() and .top()
+Added expiring items: .set(key, value, ttl=), ttl= when creating and .expire()
+Added maxsize= and max_bytes= to delete the least recently used items when full
+Added .autosave(database=, namespace=) to one SQLite row per key, CleverDict.load() and .batch()
+Added DiskCleverDict.open() for items larger than memory, loading values on first use
+all_aliases() skips checking names which are already valid attribute names
+Added .publish() and SharedCleverDict.attach() for a read-only snapshot in shared memory
+Added .autosave(lock=True, save_path=) to merge changes into a file shared by processes
+Added .watch(), .poll() and .unwatch() to apply changes made to a JSON file elsewhere
+.get_new_save_path() names never collide and are sharded into CleverDict.save_shards folders
+Added CleverDict.save_dir, .get_save_dir() and .prune_save_files()
+Added compression= to .to_json(), .to_lines() and .autosave(); detected when loading
+Added .freeze() for an immutable, hashable FrozenCleverDict, and FrozenCleverDict.thaw()
+
 version 1.9.1
 -------------
 Handles edge cases handling errors where only=/ignore=/exclude= 0 and 1 (int)
@@ -127,6 +165,22 @@ More and improved tests.
 """
 
 
+# Sentinel for "no such alias/key", cheaper than catching a KeyError:
+_missing = object()
+
+# Tie-breaker for heap entries with the same expiry time:
+_sequence = itertools.count()
+
+# For the names from CleverDict.get_new_save_path(): a per-process count,
+# and str(datetime) to timestamp e.g. "2020-12-06-03-30-57-892234":
+_save_ids = itertools.count()
+_timestamp = str.maketrans(" :.", "---")
+
+# Folders created by CleverDict.get_save_dir() and .get_new_save_path():
+# {CleverDict.save_dir: Path} and {(CleverDict.save_dir, shard number): Path}
+_save_dirs = {}
+
+
 def save(self, name=None, value=None):
     """
     Called every time a CleverDict value is created or change.
@@ -186,6 +240,8 @@ def all_aliases(name):
 
     CleverDict.expand should preferably be set via the context manager Expand.
     """
+    if CleverDict.instrumentation is not None:
+        CleverDict.instrumentation.count("all_aliases_calls")
     result = [name]
     if CleverDict.expand:
         if name == hash(name):
@@ -197,6 +253,8 @@ def all_aliases(name):
                 name = str(name)
                 if name.isidentifier() and not keyword.iskeyword(name):
                     result.append(str(name))
+            if name.isidentifier() and not keyword.iskeyword(name):
+                return result  # already a valid attribute name
 
             if not name or name[0].isdigit() or keyword.iskeyword(name):
                 norm_name = "_" + name
@@ -211,12 +269,164 @@ def all_aliases(name):
     return result
 
 
+def _item_hash(key, value):
+    """
+    Returns a 64-bit hash of an item which (unlike hash()) is the same in
+    every process.  Used by CleverDict.fingerprint().
+    """
+    import hashlib
+
+    digest = hashlib.blake2b(repr((key, value)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _decode_key(text):
+    """
+    Returns the key whose repr() is text, as saved by SQLiteStore.  Plain
+    strings and integers are decoded directly, as eval() is relatively slow.
+    """
+    if text[0] == "'" and "\\" not in text and "'" not in text[1:-1]:
+        return text[1:-1]
+    if text.isdigit():
+        return int(text)
+    return eval(text)
+
+
+def _shared_memory(name, size=None):
+    """
+    Returns the multiprocessing.shared_memory.SharedMemory block name, creating
+    it with size bytes if size is given.
+
+    Blocks aren't tracked by multiprocessing's resource tracker, which would
+    otherwise unlink them when the (first) process using them exits: like a
+    file they last until SharedCleverDict.unlink().
+    """
+    from multiprocessing import shared_memory
+
+    try:
+        return shared_memory.SharedMemory(
+            name, create=size is not None, size=size or 0, track=False
+        )
+    except TypeError:  # Python < 3.13
+        block = shared_memory.SharedMemory(name, create=size is not None, size=size or 0)
+        if os.name == "posix":
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(block._name, "shared_memory")
+        return block
+
+
+def _file_signature(path):
+    """
+    Returns (inode, size, modification time) of the file path, or None if
+    it doesn't exist.  Used to detect changes without reading the file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def _decode_json(data):
+    """
+    Returns the items of data loaded from a .to_json() file, which may be
+    a full copy (see .to_json(fullcopy=True)).
+    """
+    if set(data.keys()) == {"_mapping_encoded", "_aliases", "_vars"}:
+        return {eval(k): v for k, v in data["_mapping_encoded"].items()}
+    return data
+
+
+# Compressions supported by .to_json(), .to_lines() and .autosave() (each the
+# name of its standard library module): (possible first bytes, file extension).
+# bz2 data starts "BZh", the block size and a block (or end of stream) marker:
+_compressions = {
+    "gzip": ((b"\x1f\x8b",), ".gz"),
+    "bz2": (
+        tuple(
+            b"BZh%d%s" % (n, mark) for n in range(1, 10) for mark in (b"1AY&SY", b"\x17rE8P\x90")
+        ),
+        ".bz2",
+    ),
+    "lzma": ((b"\xfd7zXZ\x00",), ".xz"),
+}
+
+
+def _compression_module(compression):
+    """
+    Returns the standard library module (gzip, bz2 or lzma) for compression.
+    """
+    import importlib
+
+    if compression not in _compressions:
+        raise ValueError(f"compression must be one of {', '.join(_compressions)} or None")
+    return importlib.import_module(compression)
+
+
+def _detect_compression(data):
+    """
+    Returns the compression of data (bytes), from its first bytes, or None.
+    """
+    for compression, (magic, _) in _compressions.items():
+        if data.startswith(magic):
+            return compression
+    return None
+
+
+def _open_text(path, mode, compression=None):
+    """
+    Opens the UTF-8 text file path for reading ("r") or writing ("w"),
+    (de)compressing it as it's read or written, so that no compressed copy
+    is held in memory.  When reading, the compression is detected from the
+    start of the file.
+    """
+    if mode == "r":
+        with open(path, "rb") as file:
+            compression = _detect_compression(file.read(10))
+    if compression is None:
+        return open(path, mode, encoding="utf-8")
+    return _compression_module(compression).open(path, mode + "t", encoding="utf-8")
+
+
+def _decompress(data):
+    """
+    Returns data as text, decompressing it first if it's compressed bytes.
+    """
+    if isinstance(data, str):
+        return data
+    compression = _detect_compression(data)
+    if compression is not None:
+        data = _compression_module(compression).decompress(data)
+    return data.decode("utf-8")
+
+
+def _unlink_shared_memory(block):
+    """
+    Frees the shared memory block (created or attached by _shared_memory).
+    """
+    if getattr(block, "_track", True) and os.name == "posix":  # Python < 3.13
+        from multiprocessing import resource_tracker
+
+        # .unlink() unregisters it again, which the tracker reports as an error
+        resource_tracker.register(block._name, "shared_memory")
+    block.unlink()
+
+
+def _alias_bytes(name):
+    """
+    Returns name (a key or alias) encoded for SharedCleverDict's hash table.
+    Numbers equal to an int are encoded as that int, as they're the same dict key.
+    """
+    if not isinstance(name, str) and name == hash(name):
+        name = int(name)
+    return repr(name).encode()
+
+
 def get_app_dir(app_name, roaming=True, force_posix=False):
     """
     This is a self contained copy of click.get_app_dir
     """
-    import sys
-
     MSYS2 = sys.platform.startswith("win") and ("GCC" in sys.version)
     # Determine local App Engine environment, per Google's own suggestion
     APP_ENGINE = "APPENGINE_RUNTIME" in os.environ and "Development/" in os.environ.get(
@@ -262,6 +472,8 @@ def _preprocess_options(ignore, exclude, only):
     only: None | iterable
         Items to exclusively include during subsequent processing
 
+    Any one of them can be a Filter instead, in which case only is the Filter.
+
     Returns
     -------
     tuple
@@ -273,6 +485,12 @@ def _preprocess_options(ignore, exclude, only):
             return set()
         return set(arg) if hasattr(arg, "__iter__") and not isinstance(arg, str) else {arg}
 
+    for arg in (only, ignore, exclude):
+        if isinstance(arg, Filter):
+            if sum(x is not None for x in (ignore, exclude, only)) > 1:
+                raise TypeError("A Filter can't be combined with other only=/ignore=/exclude=")
+            return arg.ignore, arg
+
     if ignore == CleverDict.ignore_internals:
         ignore = None
     if exclude == CleverDict.ignore_internals:
@@ -287,6 +505,38 @@ def _preprocess_options(ignore, exclude, only):
     return make_set(ignore) | make_set(exclude) | CleverDict.ignore_internals, only
 
 
+class FileLock:
+    def __init__(self, path):
+        """
+        Provides a context manager holding an exclusive advisory lock on the
+        file path (created if needed) while inside it, using fcntl.flock (or
+        msvcrt.locking on Windows).  Only processes which also use the lock
+        are excluded.
+
+        Parameters
+        ----------
+        path : str | pathlib.Path
+        """
+        self.path = path
+
+    def __enter__(self):
+        self.file = open(self.path, "a+b")
+        try:
+            import fcntl
+
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+        except ImportError:  # Windows
+            import msvcrt
+
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *args):
+        # Closing the file releases the lock
+        self.file.close()
+
+
 class Expand:
     def __init__(self, ok):
         """
@@ -309,8 +559,637 @@ class Expand:
         CleverDict.expand = self.save_expand
 
 
-class AliasesDict(UserDict):
-    pass
+class Normaliser:
+    """
+    Extra aliases for new keys from one or more normalising policies, so for
+    example the headers "Order-ID", "order id" and "ORDER_ID" all resolve to
+    the same key via the alias order_id.
+
+    Parameters
+    ----------
+    *policies : "snake_case" | "casefold" | callable
+        Each policy is applied to the original name.  A callable receives the
+        name and returns the normalised name (or None for no extra alias).
+    maxsize : int
+        How many names' normalised forms to cache.
+
+    Set per class:
+        class Headers(CleverDict):
+            normaliser = Normaliser("snake_case")
+
+    or per instance:
+        CleverDict(mapping, normaliser="snake_case")
+
+    When a new name normalises to an existing alias, the value is written to
+    that existing key instead of creating a new one.
+    """
+
+    # Compiled Normalisers for the policies (or tuples of policies) used most
+    # recently, least recently used first.  Bounded, since callable policies
+    # (e.g. a lambda per request) may never be used again:
+    _compiled = {}
+    compiled_maxsize = 64
+
+    def __init__(self, *policies, maxsize=4096):
+        import functools
+
+        self.policies = policies
+        self.funcs = tuple(self._compile_policy(policy) for policy in policies)
+        self.aliases = functools.lru_cache(maxsize)(self._aliases)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({', '.join(map(repr, self.policies))})"
+
+    def __eq__(self, other):
+        if isinstance(other, Normaliser):
+            return self.policies == other.policies
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.policies)
+
+    @classmethod
+    def compile(cls, policy):
+        """
+        Returns a Normaliser for policy (a Normaliser, policy or tuple/list
+        of policies), reusing the Normalisers of the compiled_maxsize policies
+        used most recently.
+        """
+        if policy is None or isinstance(policy, Normaliser):
+            return policy
+        policies = tuple(policy) if isinstance(policy, (list, tuple)) else (policy,)
+        compiled = cls._compiled
+        normaliser = compiled.pop(policies, None)
+        if normaliser is None:
+            normaliser = cls(*policies)
+            while len(compiled) >= cls.compiled_maxsize:
+                compiled.pop(next(iter(compiled)), None)
+        compiled[policies] = normaliser
+        return normaliser
+
+    @staticmethod
+    def _compile_policy(policy):
+        if callable(policy):
+            return policy
+        if policy == "casefold":
+            return lambda name: name.casefold() if isinstance(name, str) else None
+        if policy == "snake_case":
+            import re
+
+            boundary = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+            separators = re.compile(r"[\W_]+")
+
+            def snake_case(name):
+                if isinstance(name, str):
+                    return separators.sub("_", boundary.sub("_", name)).strip("_").lower()
+
+            return snake_case
+        raise ValueError(f"unknown normaliser policy {policy!r}")
+
+    def _aliases(self, name):
+        result = []
+        for func in self.funcs:
+            alias = func(name)
+            if alias and alias != name and alias not in result:
+                result.append(alias)
+        return tuple(result)
+
+
+class Filter:
+    """
+    A reusable only=, ignore= or exclude= argument, created with
+    CleverDict.filter() and accepted in their place by exports and
+    constructors e.g.
+
+    >>> public = CleverDict.filter(ignore=["password", "token"])
+    >>> x.to_json(ignore=public)
+
+    The keys it selects from a CleverDict are worked out once (resolving
+    aliases) and reused until that CleverDict changes, so each export only
+    takes time in proportion to the number of items output.
+    """
+
+    def __init__(self, only=None, ignore=None, exclude=None):
+        self.ignore, self.only = _preprocess_options(ignore, exclude, only)
+        if isinstance(self.only, Filter):
+            self.ignore, self.only = self.only.ignore, self.only.only
+
+    def __repr__(self):
+        if self.only is not None:
+            return f"{self.__class__.__name__}(only={self.only!r})"
+        ignore = self.ignore - CleverDict.ignore_internals
+        return f"{self.__class__.__name__}(ignore={ignore!r})"
+
+    def __contains__(self, key):
+        return (self.only is None or key in self.only) and key not in self.ignore
+
+    def ignored_keys(self, obj):
+        """
+        Returns the frozenset of keys of CleverDict obj which this Filter
+        ignores (directly or via one of their aliases).
+        """
+        return self._cached(obj, "ignored", self._ignored_keys)
+
+    def _ignored_keys(self, obj):
+        aliases = obj._aliases
+        return frozenset(aliases.get(alias, alias) for alias in self.ignore)
+
+    def keys_for(self, obj):
+        """
+        Returns a tuple of the keys of CleverDict obj selected by this Filter.
+        """
+        return self._cached(obj, "keys", self._keys_for)
+
+    def _keys_for(self, obj):
+        ignored = self.ignored_keys(obj)
+        only = self.only
+        return tuple(k for k in obj.keys() if k not in ignored and (only is None or k in only))
+
+    def _cached(self, obj, kind, function):
+        """
+        Internal method
+        Returns function(obj), reusing the result stored in obj until obj
+        changes.
+        """
+        state = obj._state
+        cache = state.get("filter_cache")
+        if cache is None:
+            cache = state["filter_cache"] = {}
+        cached = cache.get((self, kind))
+        if cached is not None and cached[0] == state["mutations"]:
+            return cached[1]
+        result = function(obj)
+        if len(cache) >= 64:  # e.g. filters created per call
+            cache.clear()
+        cache[(self, kind)] = (state["mutations"], result)
+        return result
+
+
+class ValueIndex:
+    """
+    A secondary index of a CleverDict's items by (a function of) their
+    values, created with CleverDict.create_index() and updated by every
+    write and delete.
+
+    Equality lookups are hash lookups; range and top-k queries use a sorted
+    list of the distinct indexed values, re-sorted only after that set changes.
+    """
+
+    def __init__(self, key_func=None):
+        self.key_func = key_func
+        self.reset()
+
+    def reset(self):
+        self.index_of = {}  # key -> indexed value
+        self.keys = {}  # indexed value -> {key: None} (i.e. an ordered set)
+        self.order = None  # sorted indexed values, when up to date
+
+    def indexed(self, value):
+        """
+        Returns what value is indexed under, raising (without changing the
+        index) if key_func fails or the result isn't hashable.
+        """
+        indexed = value if self.key_func is None else self.key_func(value)
+        hash(indexed)
+        return indexed
+
+    def replace(self, key, indexed=_missing):
+        """
+        Updates the index for key changing to a value indexed under indexed
+        (from .indexed()), or being deleted.
+        """
+        old = self.index_of.get(key, _missing)
+        if old is not _missing:
+            if indexed is not _missing and indexed == old:
+                return
+            del self.index_of[key]
+            keys = self.keys[old]
+            del keys[key]
+            if not keys:
+                del self.keys[old]
+                self.order = None
+        if indexed is not _missing:
+            keys = self.keys.get(indexed)
+            if keys is None:
+                keys = self.keys[indexed] = {}
+                self.order = None
+            keys[key] = None
+            self.index_of[key] = indexed
+
+    def find(self, value):
+        return list(self.keys.get(value, ()))
+
+    def sorted_values(self):
+        if self.order is None:
+            self.order = sorted(self.keys)
+        return self.order
+
+    def find_range(self, low=None, high=None):
+        order = self.sorted_values()
+        start = 0 if low is None else bisect.bisect_left(order, low)
+        stop = len(order) if high is None else bisect.bisect_right(order, high)
+        return [key for indexed in order[start:stop] for key in self.keys[indexed]]
+
+    def top(self, k, largest=True):
+        order = self.sorted_values()
+        result = []
+        for indexed in reversed(order) if largest else order:
+            result.extend(itertools.islice(self.keys[indexed], k - len(result)))
+            if len(result) >= k:
+                break
+        return result
+
+
+class SQLiteStore:
+    """
+    A SQLite database holding the items of many autosaved CleverDicts, one
+    row per key, with each CleverDict under its own namespace.  Opened (and
+    shared by every CleverDict using the same file) with SQLiteStore.open();
+    see CleverDict.autosave(database=) and CleverDict.load().
+
+    Keys are stored as repr(key) and values as JSON.  The database is in WAL
+    mode so readers don't block the writer.  Every write is committed at
+    once, except inside "with store:" (or CleverDict.batch()), which commits
+    all its writes in a single transaction.
+
+    The store can be used from any thread.  Its connection is guarded by a
+    lock, which "with store:" holds until the transaction is committed, so
+    other threads' writes wait rather than joining the transaction.
+    """
+
+    # Resolved path -> SQLiteStore
+    _open = {}
+
+    def __init__(self, path):
+        import sqlite3
+        import threading
+
+        self.path = path
+        self.depth = 0  # of nested "with store:" blocks
+        self.lock = threading.RLock()
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS items (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+            "value TEXT NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+
+    @classmethod
+    def open(cls, path=None):
+        """
+        Returns the (shared) store for the database file path, creating the
+        file and its folder if needed.  Default: CleverDict.db in
+        CleverDict.get_save_dir().
+        """
+        from pathlib import Path
+
+        if path is None:
+            path = CleverDict.get_save_dir() / "CleverDict.db"
+        path = Path(path).resolve()
+        store = cls._open.get(path)
+        if store is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            store = cls._open[path] = cls(path)
+        return store
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+        SQLiteStore._open.pop(self.path, None)
+
+    def __enter__(self):
+        self.lock.acquire()
+        if self.depth == 0:
+            self.connection.execute("BEGIN")
+        self.depth += 1
+        return self
+
+    def __exit__(self, *args):
+        # Committed even after an exception: the CleverDict keeps the changes
+        # made before it, so the database should too.
+        try:
+            self.depth -= 1
+            if self.depth == 0:
+                self.connection.execute("COMMIT")
+        finally:
+            self.lock.release()
+
+    def save(self, namespace, key, value):
+        """
+        Inserts or updates the row for key.  Returns the bytes of JSON written.
+        """
+        import json
+
+        value = json.dumps(value)
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO items VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace, key) DO UPDATE SET value = excluded.value",
+                (namespace, repr(key), value),
+            )
+        return len(value)
+
+    def delete(self, namespace, key):
+        with self.lock:
+            self.connection.execute(
+                "DELETE FROM items WHERE namespace = ? AND key = ?", (namespace, repr(key))
+            )
+
+    def replace(self, namespace, mapping):
+        """
+        Replaces all the rows of namespace with the items of mapping, in one
+        transaction.  Returns the bytes of JSON written.
+        """
+        import json
+
+        rows = [(namespace, repr(k), json.dumps(v)) for k, v in mapping.items()]
+        with self:
+            self.drop(namespace)
+            self.connection.executemany("INSERT INTO items VALUES (?, ?, ?)", rows)
+        return sum(len(row[2]) for row in rows)
+
+    def load(self, namespace):
+        """
+        Returns the items of namespace as a dict, in the order keys were first saved.
+        """
+        import json
+
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key, value FROM items WHERE namespace = ? ORDER BY rowid", (namespace,)
+            ).fetchall()
+        return {_decode_key(k): json.loads(v) for k, v in rows}
+
+    def keys(self, namespace):
+        """
+        Returns the keys of namespace in the order they were first saved,
+        without reading their values.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT key FROM items WHERE namespace = ? ORDER BY rowid", (namespace,)
+            ).fetchall()
+        return [_decode_key(k) for k, in rows]
+
+    def get(self, namespace, key):
+        """
+        Returns the value of key in namespace, raising KeyError if there's no such row.
+        """
+        import json
+
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value FROM items WHERE namespace = ? AND key = ?", (namespace, repr(key))
+            ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def namespaces(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT DISTINCT namespace FROM items").fetchall()
+        return [namespace for namespace, in rows]
+
+    def drop(self, namespace):
+        with self.lock:
+            self.connection.execute("DELETE FROM items WHERE namespace = ?", (namespace,))
+
+
+class Instrumentation:
+    """
+    Opt-in registry of counters and latency histograms for CleverDict internals.
+
+    Usually created via CleverDict.enable_instrumentation().  Nothing is
+    recorded (and almost nothing is spent) while CleverDict.instrumentation
+    is None.
+
+    Metrics recorded:
+        hook_calls, hook_seconds: save/delete hook calls (labels: hook, label)
+        alias_hits, alias_misses: name resolution in get_key (label)
+        all_aliases_calls: calls to all_aliases()
+        to_json_seconds, from_json_seconds, autosave_seconds (label)
+        bytes_written: bytes written by to_json/autosave (operation, label)
+
+    Parameters
+    ----------
+    slow_hook: float | None
+        A RuntimeWarning is issued for hook calls taking longer than this
+        many seconds.  None disables the warning.
+
+    label: function | None
+        Called with a CleverDict instance to obtain the label its metrics are
+        recorded under.  Defaults to the class name; return something more
+        specific (e.g. a tenant name) to find individual hot instances.
+    """
+
+    # Upper bounds (seconds) of the latency histogram buckets:
+    buckets = (0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0)
+
+    def __init__(self, slow_hook=0.1, label=None):
+        self.slow_hook = slow_hook
+        self.label = label or (lambda obj: obj.__class__.__name__)
+        self.labelling = False
+        self.reset()
+
+    def reset(self):
+        """
+        Discards all recorded metrics.
+        """
+        self.counters = {}
+        self.histograms = {}
+
+    def label_for(self, obj):
+        """
+        Returns the label for obj's metrics, or None if called from within the
+        label function itself (whose own lookups aren't recorded).
+        """
+        if self.labelling:
+            return None
+        self.labelling = True
+        try:
+            return self.label(obj)
+        finally:
+            self.labelling = False
+
+    def count(self, metric, amount=1, **labels):
+        """
+        Adds amount to the counter metric with the given labels.
+        """
+        key = (metric, tuple(sorted(labels.items())))
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def observe(self, metric, seconds, **labels):
+        """
+        Records a duration (in seconds) in the histogram metric with the given labels.
+        """
+        key = (metric, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        histogram[0][bisect.bisect_left(self.buckets, seconds)] += 1
+        histogram[1] += seconds
+
+    def call_hook(self, obj, hook, *args, **kwargs):
+        """
+        Calls obj.save or obj.delete (hook), timing the call and warning if slow.
+        """
+        start = perf_counter()
+        try:
+            return getattr(obj, hook)(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            label = self.label_for(obj)
+            self.count("hook_calls", hook=hook, label=label)
+            self.observe("hook_seconds", elapsed, hook=hook, label=label)
+            if self.slow_hook is not None and elapsed > self.slow_hook:
+                import warnings
+
+                warnings.warn(
+                    f"slow {hook} hook on {label}: {elapsed:.3f}s",
+                    RuntimeWarning,
+                    stacklevel=3,
+                )
+
+    def record_io(self, operation, obj, seconds, nbytes=None):
+        """
+        Records the duration (and bytes written, if any) of to_json, from_json or autosave.
+        """
+        label = self.label_for(obj) if isinstance(obj, CleverDict) else obj.__name__
+        self.observe(f"{operation}_seconds", seconds, label=label)
+        if nbytes is not None:
+            self.count("bytes_written", nbytes, operation=operation, label=label)
+
+    def to_dict(self):
+        """
+        Returns all metrics as plain dicts and lists, e.g. for json.dumps().
+
+        Histogram buckets are cumulative and keyed by their upper bound, as in
+        the Prometheus text format.
+        """
+        result = {"counters": {}, "histograms": {}}
+        for (metric, labels), value in sorted(self.counters.items(), key=repr):
+            result["counters"].setdefault(metric, []).append(
+                {"labels": dict(labels), "value": value}
+            )
+        for (metric, labels), (counts, total) in sorted(self.histograms.items(), key=repr):
+            cumulative = list(itertools.accumulate(counts))
+            result["histograms"].setdefault(metric, []).append(
+                {
+                    "labels": dict(labels),
+                    "buckets": dict(zip(self.buckets + ("+Inf",), cumulative)),
+                    "sum": total,
+                    "count": cumulative[-1],
+                }
+            )
+        return result
+
+    def to_prometheus(self, prefix="cleverdict_"):
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        Counter names end in _total, as Prometheus expects.
+        """
+
+        def format_labels(labels, **extra):
+            labels = {**labels, **extra}
+            if not labels:
+                return ""
+            return "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels.items()) + "}"
+
+        def escape(value):
+            return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+        lines = []
+        data = self.to_dict()
+        for metric, samples in data["counters"].items():
+            if not metric.endswith("_total"):
+                metric += "_total"
+            lines.append(f"# TYPE {prefix}{metric} counter")
+            for sample in samples:
+                lines.append(f"{prefix}{metric}{format_labels(sample['labels'])} {sample['value']}")
+        for metric, samples in data["histograms"].items():
+            lines.append(f"# TYPE {prefix}{metric} histogram")
+            for sample in samples:
+                for bound, count in sample["buckets"].items():
+                    labels = format_labels(sample["labels"], le=bound)
+                    lines.append(f"{prefix}{metric}_bucket{labels} {count}")
+                labels = format_labels(sample["labels"])
+                lines.append(f"{prefix}{metric}_sum{labels} {sample['sum']}")
+                lines.append(f"{prefix}{metric}_count{labels} {sample['count']}")
+        return "\n".join(lines) + "\n"
+
+
+class AliasesDict(dict):
+    """
+    The alias table of a CleverDict: {alias: key}, including each key itself.
+
+    .aliases_of(key) builds a reverse index {key: {alias: None}} the first
+    time it's called and keeps it up to date from then on, so deleting a key
+    only touches that key's aliases rather than scanning the whole table.
+    """
+
+    _by_key = None
+
+    def aliases_of(self, key):
+        """
+        Returns a list of the aliases (including the key itself) of key.
+        """
+        by_key = self._by_key
+        if by_key is None:
+            by_key = {}
+            for alias, k in self.items():
+                by_key.setdefault(k, {})[alias] = None
+            self._by_key = by_key
+        return list(by_key.get(key, ()))
+
+    def __setitem__(self, alias, key):
+        by_key = self._by_key
+        if by_key is not None:
+            old = self.get(alias, _missing)
+            if old is not _missing:
+                self._unindex(old, alias)
+            by_key.setdefault(key, {})[alias] = None
+        dict.__setitem__(self, alias, key)
+
+    def __delitem__(self, alias):
+        key = self[alias]
+        dict.__delitem__(self, alias)
+        if self._by_key is not None:
+            self._unindex(key, alias)
+
+    def _unindex(self, key, alias):
+        aliases = self._by_key[key]
+        del aliases[alias]
+        if not aliases:
+            del self._by_key[key]
+
+    def clear(self):
+        dict.clear(self)
+        self._by_key = None
+
+    def _reindex(self, *args, **kwargs):
+        # Any other change: the index is rebuilt when next needed.
+        self._by_key = None
+
+    def pop(self, *args):
+        self._reindex()
+        return dict.pop(self, *args)
+
+    def popitem(self):
+        self._reindex()
+        return dict.popitem(self)
+
+    def setdefault(self, *args):
+        self._reindex()
+        return dict.setdefault(self, *args)
+
+    def update(self, *args, **kwargs):
+        self._reindex()
+        dict.update(self, *args, **kwargs)
+
+    def __ior__(self, other):
+        self._reindex()
+        return dict.__ior__(self, other)
 
 
 class CleverDict(dict):
@@ -347,6 +1226,12 @@ class CleverDict(dict):
             value : value of this attribute.
     """
 
+    # Per-instance bookkeeping (the version counter, caches, indexes, expiry
+    # and LRU state, database autosave settings ...) is kept in one dict in
+    # the _state slot rather than in __dict__, so it's never mistaken for a
+    # direct attribute, exported or compared, and never clashes with a key.
+    __slots__ = ("_state", "__dict__", "__weakref__")
+
     # Add .save & / .delete methods and create 'vanilla' copies to revert to
     original_save = save = save
     original_delete = delete = delete
@@ -357,6 +1242,34 @@ class CleverDict(dict):
     # Used by .delete_alias:
     expand = True
 
+    # Set via .enable_instrumentation():
+    instrumentation = None
+
+    # Normaliser (or policy name/callable) for extra aliases of new keys;
+    # overridden per instance by the normaliser= argument:
+    normaliser = None
+
+    # repr() of larger objects is a (cached) summary of the first repr_limit
+    # items; None for no limit.  .__repr__(full=True) is always complete:
+    repr_limit = 100
+
+    # Folder for new autosave files (see .get_new_save_path()); None for the
+    # Operating System's settings folder.  Files are spread over save_shards
+    # subfolders so that no folder gets too big (0 for none):
+    save_dir = None
+    save_shards = 256
+
+    # Returns the value of a key (not alias) for internal reads; DiskCleverDict
+    # overrides it to load values on first use:
+    _value = dict.__getitem__
+
+    def __new__(cls, *args, **kwargs):
+        # Here rather than in __init__, for subclasses which set direct
+        # attributes first and for copies (which don't call __init__):
+        self = super().__new__(cls, *args, **kwargs)
+        object.__setattr__(self, "_state", {"mutations": 0})
+        return self
+
     def __init__(
         self,
         mapping=(),
@@ -367,10 +1280,31 @@ class CleverDict(dict):
         only=None,
         ignore=None,
         exclude=None,
+        normaliser=None,
+        ttl=None,
+        maxsize=None,
+        max_bytes=None,
         **kwargs,
     ):
         ignore, only = _preprocess_options(ignore, exclude, only)
+        state = self._state
         self.setattr_direct("_aliases", AliasesDict())
+        if isinstance(mapping, CleverDict):
+            normaliser = normaliser or mapping._state.get("normaliser")
+            ttl = ttl or mapping._state.get("ttl")
+            if "lru" in mapping._state:
+                maxsize = maxsize or mapping._state["lru"][1]
+                max_bytes = max_bytes or mapping._state["lru"][2]
+        if normaliser is not None:
+            state["normaliser"] = Normaliser.compile(normaliser)
+        if ttl is not None:
+            state["ttl"] = ttl
+            state["expiry"] = ({}, [])
+        if maxsize is not None or max_bytes is not None:
+            from collections import OrderedDict
+
+            # [{key: bytes} least recently used first, maxsize, max_bytes, total bytes]
+            state["lru"] = [OrderedDict(), maxsize, max_bytes, 0]
         self.check_if_unallowed_key(mapping, _aliases)
         if isinstance(mapping, CleverDict):
             # for key, alias in mapping._aliases.items():
@@ -402,36 +1336,100 @@ class CleverDict(dict):
                 self.setattr_direct(k, v)
 
     def __setattr__(self, name, value):
-        if name in vars(self).keys():
-            super().__setattr__(name, value)
+        # The write path is chosen on every write from a few cheap checks
+        # rather than cached flags, so direct attributes and hooks (including
+        # CleverDict.save = func set after instances exist) are picked up
+        # immediately.
+        _dict = self.__dict__
+        state = self._state
+        if name in _dict:
+            object.__setattr__(self, name, value)
         else:
-            if name in self._aliases:
-                name = self._aliases[name]
-            elif name not in self:
-                for al in all_aliases(name):
-                    self._add_alias(name, al)
-            super().__setitem__(name, value)
-        self.save(name=name, value=value)
+            if "indexes" in state:
+                # Worked out first, so that a failing key_func changes nothing:
+                indexed = [(index, index.indexed(value)) for index in state["indexes"].values()]
+            key = self._aliases.get(name, _missing)
+            if key is not _missing:
+                name = key
+            elif not dict.__contains__(self, name):
+                if CleverDict.expand:
+                    normaliser = state.get("normaliser", type(self).normaliser)
+                    if normaliser is None:
+                        for al in all_aliases(name):
+                            self._add_alias(name, al)
+                    else:
+                        name = self._add_normalised_aliases(name, normaliser)
+                else:
+                    self._aliases[name] = name
+            if "fingerprint" in state:
+                self._update_fingerprint(name, value)
+            if "indexes" in state:
+                for index, value_indexed in indexed:
+                    index.replace(name, value_indexed)
+            dict.__setitem__(self, name, value)
+            if "expiry" in state:
+                self._set_expiry(name, state.get("ttl"))
+            if "lru" in state:
+                self._lru_add(name, value)
+        state["mutations"] += 1
+        if CleverDict.instrumentation is not None:
+            CleverDict.instrumentation.call_hook(self, "save", name=name, value=value)
+        elif "save" in _dict or type(self).save is not save:
+            # Skipped for a plain in-memory CleverDict, whose .save is a no-op
+            self.save(name=name, value=value)
 
     __setitem__ = __setattr__
 
     def __getitem__(self, name):
-        name = self.get_key(name)
-        return super().__getitem__(name)
+        key = self._aliases.get(name, _missing)
+        if CleverDict.instrumentation is not None:
+            self._count_resolution(key)
+        state = self._state
+        if key is _missing or ("expiry" in state and self._expired(key)):
+            raise KeyError(name)
+        if "lru" in state:
+            state["lru"][0].move_to_end(key)
+        return dict.__getitem__(self, key)
 
     def __getattr__(self, name):
-        try:
-            return self[name]
-        except KeyError as e:
-            raise AttributeError(e)
+        # Only called if normal attribute lookup fails, so resolve the alias
+        # directly rather than via self[name] and a KeyError.
+        if name == "_aliases":  # i.e. before __init__ created it
+            raise AttributeError(name)
+        key = self._aliases.get(name, _missing)
+        if CleverDict.instrumentation is not None:
+            self._count_resolution(key)
+        if key is not _missing:
+            value = dict.get(self, key, _missing)
+            state = self._state
+            if value is not _missing and not ("expiry" in state and self._expired(key)):
+                if "lru" in state:
+                    state["lru"][0].move_to_end(key)
+                return value
+        raise AttributeError(repr(name))
 
     def __delitem__(self, name):
         name = self.get_key(name)
+        state = self._state
+        if "fingerprint" in state:
+            self._update_fingerprint(name)
+        for index in state.get("indexes", {}).values():
+            index.replace(name)
+        if "expiry" in state:
+            state["expiry"][0].pop(name, None)
+        if "lru" in state:
+            lru = state["lru"]
+            lru[3] -= lru[0].pop(name, 0)
         super().__delitem__(name)
-        self.delete(name=name)
-        for ak, av in list(self._aliases.items()):
-            if av == name:
-                del self._aliases[ak]
+        state["mutations"] += 1
+        state.pop("key_positions", None)  # positions after name have changed
+        if CleverDict.instrumentation is not None:
+            CleverDict.instrumentation.call_hook(self, "delete", name=name)
+        elif "delete" in self.__dict__ or type(self).delete is not delete:
+            self.delete(name=name)
+        aliases = self._aliases
+        for alias in aliases.aliases_of(name):
+            del aliases[alias]
 
     def __delattr__(self, name):
         try:
@@ -439,16 +1437,104 @@ class CleverDict(dict):
         except KeyError as e:
             if hasattr(self, name):
                 super().__delattr__(name)
-                self.delete(name=name)
+                self._state["mutations"] += 1
+                self._call_hook("delete", name=name)
             else:
                 raise AttributeError(e)
 
+    # Expired items (see .set()) are deleted first.  __iter__ isn't
+    # overridden, as that would make dict(x) and {**x} much slower.
+    def __contains__(self, name):
+        if "expiry" in self._state:
+            self.expire()
+        return dict.__contains__(self, name)
+
+    def __len__(self):
+        if "expiry" in self._state:
+            self.expire()
+        return dict.__len__(self)
+
+    def __setstate__(self, state):
+        # Used by copy.deepcopy(): state is (__dict__, {"_state": ...}), which
+        # mustn't go through __setattr__ and become items.
+        attributes, slots = state
+        vars(self).update(attributes or {})
+        object.__setattr__(self, "_state", slots["_state"])
+
     def __eq__(self, other):
         if isinstance(other, CleverDict):
             return self.items() == other.items() and vars(self) == vars(other)
         return NotImplemented
 
-    def __repr__(self, ignore=None, exclude=None, only=None):
+    def pop(self, name, default=_missing):
+        """
+        The same as dict.pop(), but name can be an alias and the key is
+        deleted via __delitem__ (so aliases and .delete are handled).
+        """
+        key = self._aliases.get(name, _missing)
+        if key is _missing or not dict.__contains__(self, key):
+            if default is _missing:
+                raise KeyError(name)
+            return default
+        value = self._value(key)
+        del self[key]
+        return value
+
+    def popitem(self):
+        """
+        The same as dict.popitem() (last in, first out), deleting via __delitem__.
+        """
+        if not self:
+            raise KeyError("popitem(): dictionary is empty")
+        key = next(reversed(self.keys()))
+        return key, self.pop(key)
+
+    def setdefault(self, name, default=None):
+        """
+        The same as dict.setdefault(), but name can be an alias and new items
+        are set via __setitem__.
+        """
+        key = self._aliases.get(name, _missing)
+        if key is not _missing and dict.__contains__(self, key):
+            return self._value(key)
+        self[name] = default
+        return default
+
+    def clear(self):
+        """
+        Removes all items and aliases, calling .delete for each key.
+
+        Autosaves (see .autosave()) are written once rather than per key,
+        and a custom .delete is called for each key inside .batch().
+        """
+        keys = list(self.keys())
+        dict.clear(self)
+        self._aliases.clear()
+        state = self._state
+        state["mutations"] += 1
+        state.pop("key_positions", None)
+        if "fingerprint" in state:
+            state["fingerprint"] = [0, {}]
+        for index in state.get("indexes", {}).values():
+            index.reset()
+        if "expiry" in state:
+            state["expiry"] = ({}, [])
+        if "lru" in state:
+            state["lru"][0].clear()
+            state["lru"][3] = 0
+        autosave = getattr(vars(self).get("delete"), "__func__", None)
+        if autosave is CleverDict._auto_delete_merge:
+            import json
+
+            self._merge_into_file({}, deleted=json.loads(json.dumps(dict.fromkeys(keys))))
+        elif autosave in _clear_all_hooks:
+            self._call_hook("delete", name=None)
+        else:
+            with self.batch():
+                for key in keys:
+                    self._call_hook("delete", name=key)
+
+    def __repr__(self, ignore=None, exclude=None, only=None, full=False):
         """
         Parameters
         ----------
@@ -461,9 +1547,28 @@ class CleverDict(dict):
 
         only: iterable | str
             Only return output for specified keys
+
+        full: bool
+            if False, output with more than .repr_limit items is summarised
+            as the first .repr_limit items and a count (not eval-able)
+            if True, always returns the complete, eval-able representation
+
+        Note
+        ----
+        Summaries of unfiltered output are cached until the CleverDict is
+        next changed.  Changes inside mutable values aren't tracked, so a
+        cached summary can show their previous contents.
         """
-        explicit_ignore = ignore or set()
-        explicit_ignore = set(explicit_ignore)
+        limit = None if full else self.repr_limit
+        if limit is not None and ignore is exclude is only is None and len(self) > limit:
+            state = self._state
+            cached = state.get("repr_cache")
+            if cached and cached[0] == (state["mutations"], limit):
+                return cached[1]
+            output = self._repr_summary(itertools.islice(self.items(), limit), len(self))
+            state["repr_cache"] = ((state["mutations"], limit), output)
+            return output
+        explicit_ignore = set() if isinstance(ignore, Filter) else set(ignore or ())
         ignore, only = _preprocess_options(ignore, exclude, only)
         # check if an alias was used with the same name as an internal one
         # if so we include them if not explicit ignored
@@ -473,13 +1578,34 @@ class CleverDict(dict):
             } & ignore | explicit_ignore
 
         mapping = self._filtered_mapping(ignore, only)
+        if limit is not None and len(mapping) > limit:
+            return self._repr_summary(itertools.islice(mapping.items(), limit), len(mapping))
         _aliases = AliasesDict(
             {k: v for k, v in self._aliases.items() if k not in self and v in mapping}
         )
         _vars = {k: v for k, v in vars(self).items() if k not in ignore}
+        options = ""
+        state = self._state
+        if "normaliser" in state:
+            options += f", normaliser={state['normaliser'].policies!r}"
+        if "ttl" in state:
+            options += f", ttl={state['ttl']!r}"
+        if "lru" in state:
+            options += f", maxsize={state['lru'][1]!r}, max_bytes={state['lru'][2]!r}"
         return (
             f"{self.__class__.__name__}("
-            f"{repr(mapping)}, _aliases={repr(_aliases)}, _vars={repr(_vars)})"
+            f"{repr(mapping)}, _aliases={repr(_aliases)}, _vars={repr(_vars)}{options})"
+        )
+
+    def _repr_summary(self, items, count):
+        """
+        Internal method
+        Returns the summary form of __repr__ for items, the first of count.
+        """
+        shown = [f"{k!r}: {v!r}" for k, v in items]
+        return (
+            f"{self.__class__.__name__}({{{', '.join(shown)}, ...}}, "
+            f"<{count} items, {count - len(shown)} not shown>)"
         )
 
     @property
@@ -526,20 +1652,266 @@ class CleverDict(dict):
         -----
         If name can't be found, a KeyError is raised
         """
-        if name in self._aliases:
-            return self._aliases[name]
-        raise KeyError(name)
+        key = self._aliases.get(name, _missing)
+        if CleverDict.instrumentation is not None:
+            self._count_resolution(key)
+        if key is _missing:
+            raise KeyError(name)
+        return key
+
+    def get_version(self):
+        """
+        Returns a number which increases with every change to the CleverDict:
+        items, aliases and direct attributes.
 
-    def _filtered_mapping(self, ignore=None, only=False):
+        Two calls returning the same number mean nothing has changed in
+        between (apart from changes made inside mutable values).
         """
-        Internal method
-        The user should use to_dict !
+        return self._state["mutations"]
 
-        Returns a dictionary of items not excluded by 'ignore' list
+    def fingerprint(self):
+        """
+        Returns an order-independent hash of the items (keys and values).
 
-        Parameters
-        ----------
-        ignore: iterable | str
+        Equal items give equal fingerprints in every process, as long as
+        their repr() doesn't vary (e.g. sets of strings do), so workers can
+        compare large CleverDicts cheaply.  The first call takes time
+        proportional to the number of items; after that the fingerprint is
+        updated with every write and delete, which needs the hash of each
+        item to be kept.
+
+        Changes made inside mutable values (e.g. x.a.append(1)) aren't seen
+        until that item is next set or deleted.
+        """
+        state = self._state
+        if "fingerprint" not in state:
+            hashes = {k: _item_hash(k, v) for k, v in self.items()}
+            # [fingerprint, {key: hash of the item as last added}]
+            state["fingerprint"] = [sum(hashes.values()) % 2**64, hashes]
+        return state["fingerprint"][0]
+
+    def _update_fingerprint(self, key, value=_missing):
+        """
+        Internal method
+        Updates the fingerprint for key changing to value (or being deleted),
+        replacing the hash the item was added with, even if its value has
+        since changed in place.
+        """
+        stored = self._state["fingerprint"]
+        hashes = stored[1]
+        if value is not _missing:
+            item_hash = _item_hash(key, value)
+        fingerprint = stored[0] - hashes.pop(key, 0)
+        if value is not _missing:
+            hashes[key] = item_hash
+            fingerprint += item_hash
+        stored[0] = fingerprint % 2**64
+
+    def set(self, name, value, ttl=None):
+        """
+        Sets name (a key or alias) to value, like x[name] = value, optionally
+        expiring after ttl seconds.
+
+        Parameters
+        ----------
+        name : any
+            key or alias
+
+        value : any
+
+        ttl : float
+            Seconds until the item expires.  Default: the ttl= given when
+            creating the CleverDict (if any); float("inf") for no expiry.
+
+        Notes
+        -----
+        Expired items are deleted (via __delitem__, so the delete hook is
+        called and aliases removed) when next read, and in bulk by .expire(),
+        which also runs after writes and before len(), "in", repr() and
+        exports.  Iterating over the keys, values or items (or dict(x))
+        doesn't check, so call .expire() first if that matters.
+
+        Setting the item again without ttl (e.g. x[name] = value) gives it
+        the default ttl, so a ttl given here only lasts until the next write.
+        """
+        self[name] = value
+        if ttl is not None:
+            self._set_expiry(self.get_key(name), ttl)
+
+    def expire(self):
+        """
+        Deletes all expired items (see .set()), soonest expiry first.
+
+        Returns
+        -------
+        The keys deleted : list
+        """
+        if "expiry" not in self._state:
+            return []
+        expiry, heap = self._state["expiry"]
+        now = monotonic()
+        deleted = []
+        while heap and heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(heap)
+            if expiry.get(key) == deadline:  # otherwise reset or deleted since
+                del self[key]
+                deleted.append(key)
+        return deleted
+
+    def _set_expiry(self, key, ttl):
+        """
+        Internal method
+        Sets (or with ttl None, removes) the expiry time of key, then deletes
+        any items which have expired.
+        """
+        state = self._state
+        if "expiry" not in state:
+            state["expiry"] = ({}, [])
+        expiry, heap = state["expiry"]
+        if ttl is None or ttl == float("inf"):
+            expiry.pop(key, None)
+            return
+        now = monotonic()
+        expiry[key] = deadline = now + ttl
+        heapq.heappush(heap, (deadline, next(_sequence), key))
+        if len(heap) > 2 * len(expiry) + 64:  # mostly stale entries
+            heap[:] = [(d, next(_sequence), k) for k, d in expiry.items()]
+            heapq.heapify(heap)
+        if heap[0][0] <= now:
+            self.expire()
+
+    def _lru_add(self, key, value):
+        """
+        Internal method
+        Records key as the most recently used item, then deletes the least
+        recently used items (via __delitem__) until within maxsize and max_bytes.
+        The item just set is never deleted, even if it's larger than max_bytes.
+        """
+        lru = self._state["lru"]
+        order, maxsize, max_bytes = lru[:3]
+        size = 0
+        if max_bytes is not None:
+            size = sys.getsizeof(key) + sys.getsizeof(value)
+            lru[3] += size - order.get(key, 0)
+        order[key] = size
+        order.move_to_end(key)
+        while len(order) > 1 and (
+            (maxsize is not None and len(order) > maxsize)
+            or (max_bytes is not None and lru[3] > max_bytes)
+        ):
+            self._evict(next(iter(order)))
+
+    def _evict(self, key):
+        """
+        Internal method
+        Removes the least recently used item key when over maxsize or max_bytes.
+        """
+        del self[key]
+
+    def _expired(self, key):
+        """
+        Internal method
+        Returns True (after deleting key) if key has expired.
+        """
+        deadline = self._state["expiry"][0].get(key)
+        if deadline is not None and deadline <= monotonic():
+            del self[key]
+            return True
+        return False
+
+    def get(self, name, default=None):
+        """
+        Returns the value for name (a key or any of its aliases) if present,
+        otherwise default.  Never raises KeyError.
+
+        Parameters
+        ----------
+        name : any
+            key or alias to be searched
+
+        default : any
+            returned if name can't be found
+        """
+        key = self._aliases.get(name, _missing)
+        if CleverDict.instrumentation is not None:
+            self._count_resolution(key)
+        state = self._state
+        if key is _missing or ("expiry" in state and self._expired(key)):
+            return default
+        if "lru" in state and dict.__contains__(self, key):
+            state["lru"][0].move_to_end(key)
+        return dict.get(self, key, default)
+
+    @property
+    def _stats_label(self):
+        return CleverDict.instrumentation.label_for(self)
+
+    def _count_resolution(self, key):
+        """
+        Internal method
+
+        Counts an alias hit (or a miss if key is _missing) for instrumentation.
+        """
+        label = self._stats_label
+        if label is not None:
+            metric = "alias_misses" if key is _missing else "alias_hits"
+            CleverDict.instrumentation.count(metric, label=label)
+
+    def _call_hook(self, hook, *args, **kwargs):
+        """
+        Internal method
+
+        Calls the .save or .delete method (hook), timing the call if
+        instrumentation is enabled.
+        """
+        if CleverDict.instrumentation is None:
+            return getattr(self, hook)(*args, **kwargs)
+        return CleverDict.instrumentation.call_hook(self, hook, *args, **kwargs)
+
+    @classmethod
+    def enable_instrumentation(cls, slow_hook=0.1, label=None):
+        """
+        Starts recording counters and latency histograms for all CleverDicts.
+
+        Parameters
+        ----------
+        slow_hook: float | None
+            Seconds after which a save/delete hook call issues a RuntimeWarning.
+
+        label: function | None
+            Called with an instance to get the label its metrics are recorded
+            under.  Defaults to the class name.
+
+        Returns
+        -------
+        The active registry : Instrumentation
+            Use .to_dict() or .to_prometheus() to export the metrics.
+        """
+        CleverDict.instrumentation = Instrumentation(slow_hook=slow_hook, label=label)
+        return CleverDict.instrumentation
+
+    @classmethod
+    def disable_instrumentation(cls):
+        """
+        Stops recording metrics.
+
+        Returns
+        -------
+        The registry which was active (if any) : Instrumentation | None
+        """
+        instrumentation, CleverDict.instrumentation = CleverDict.instrumentation, None
+        return instrumentation
+
+    def _filtered_mapping(self, ignore=None, only=False):
+        """
+        Internal method
+        The user should use to_dict !
+
+        Returns a dictionary of items not excluded by 'ignore' list
+
+        Parameters
+        ----------
+        ignore: iterable | str
             Any keys or aliases to exclude from output.
 
         exclude: iterable | str
@@ -556,6 +1928,10 @@ class CleverDict(dict):
         ----
         The CleverDict.ignore items are not filtered out.
         """
+        if "expiry" in self._state:
+            self.expire()
+        if isinstance(only, Filter):
+            return {k: self._value(k) for k in only.keys_for(self)}
         mapping = {k: v for k, v in self.items() if k not in ignore}
         for k, v in self._aliases.items():
             if k in ignore and v in mapping:
@@ -578,10 +1954,38 @@ class CleverDict(dict):
         if hasattr(mapping, "items"):
             mapping = getattr(mapping, "items")()
 
-        for k, v in itertools.chain(mapping, getattr(kwargs, "items")()):
-            self.__setitem__(k, v)
+        items = itertools.chain(mapping, getattr(kwargs, "items")())
+        if "store" in self._state:
+            with self._state["store"]:  # one transaction
+                for k, v in items:
+                    self.__setitem__(k, v)
+        else:
+            for k, v in items:
+                self.__setitem__(k, v)
+
+    def batch(self):
+        """
+        Returns a context manager which, if autosaving to a database, saves
+        all the changes made inside it in a single transaction:
 
-    def info(self, as_str=False, ignore=None, exclude=None, only=None):
+            with x.batch():
+                x.a = 1
+                del x.b
+        """
+        from contextlib import nullcontext
+
+        return self._state.get("store") or nullcontext()
+
+    def info(
+        self,
+        as_str=False,
+        ignore=None,
+        exclude=None,
+        only=None,
+        file=None,
+        max_items=None,
+        find_names=True,
+    ):
         """
         Prints or returns a string showing variable name equivalence
         and object attribute/dictionary key equivalence.
@@ -601,47 +2005,72 @@ class CleverDict(dict):
         only: iterable | str
             Only return output for specified keys
 
+        file: file object
+            Write the information line by line to file (instead of stdout)
+
+        max_items: int
+            Show at most this many keys, followed by a count of the rest
+
+        find_names: bool
+            if True, looks up the caller's variable names for this object
+            if False, uses x (cheaper, e.g. for debug endpoints)
+
         Returns
         -------
         information (if as_str is True): str
         None (if as_str is False)
         """
+        lines = self._info_lines(ignore, exclude, only, max_items, find_names)
+        if as_str:
+            return "\n".join(lines)
+        if file is None:
+            file = sys.stdout
+        for line in lines:
+            file.write(line + "\n")
+
+    def _info_lines(self, ignore, exclude, only, max_items, find_names):
+        """
+        Internal method
+        Generates the lines of .info() in time proportional to the number of
+        keys and aliases.
+        """
         ignore, only = _preprocess_options(ignore, exclude, only)
         mapping = self._filtered_mapping(ignore, only)
         indent = "    "
-        frame = inspect.currentframe().f_back.f_locals
-        ids = sorted(k for k, v in frame.items() if v is self)
-        result = [self.__class__.__name__ + ":"]
+        ids = []
+        if find_names:
+            import inspect
+
+            # Two frames up: _info_lines <- info <- caller
+            frame = inspect.currentframe().f_back.f_back.f_locals
+            ids = sorted(k for k, v in frame.items() if v is self)
+        yield self.__class__.__name__ + ":"
         if ids:
             if len(ids) > 1:
-                result.append(indent + " is ".join(ids))
+                yield indent + " is ".join(ids)
             # If more than one variable has the same name, use the first:
             id = ids[0]
         else:
             id = "x"
-        for k, v in mapping.items():
-            parts = []
-            for ak, av in self._aliases.items():
-                if av == k:
-                    parts.append(f"{id}[{repr(ak)}]")
-            for ak, av in self._aliases.items():
-                if (
-                    av == k
-                    and isinstance(ak, str)
-                    and ak.isidentifier()
-                    and not keyword.iskeyword(ak)
-                ):
-                    parts.append(f"{id}.{ak}")
+        aliases = {}
+        for ak, av in self._aliases.items():
+            aliases.setdefault(av, []).append(ak)
+        for count, (k, v) in enumerate(mapping.items()):
+            if max_items is not None and count >= max_items:
+                yield f"{indent}... {len(mapping) - count} more"
+                break
+            names = aliases.get(k, ())
+            parts = [f"{id}[{repr(ak)}]" for ak in names]
+            parts += [
+                f"{id}.{ak}"
+                for ak in names
+                if isinstance(ak, str) and ak.isidentifier() and not keyword.iskeyword(ak)
+            ]
             parts.append(f"{repr(v)}")
-            result.append(indent + " == ".join(parts))
+            yield indent + " == ".join(parts)
         for k, v in vars(self).items():
             if k not in ignore:
-                result.append(f"{indent}{id}.{k} == {repr(v)}")
-        output = "\n".join(result)
-        if as_str:
-            return output
-        else:
-            print(output)
+                yield f"{indent}{id}.{k} == {repr(v)}"
 
     _default = object()
 
@@ -665,6 +2094,27 @@ class CleverDict(dict):
         else:
             return [ak for ak, av in self._aliases.items() if av == self.get_key(name)]
 
+    def _add_normalised_aliases(self, name, normaliser):
+        """
+        Internal method for adding the aliases of a new key name, including
+        its normalised forms.
+
+        Returns the key to set: name itself, or an existing key if a
+        normalised form of name is already one of its aliases.
+        """
+        normalised = Normaliser.compile(normaliser).aliases(name)
+        for alias in normalised:
+            key = self._aliases.get(alias, _missing)
+            if key is not _missing:
+                self._aliases[name] = key
+                return key
+        for al in all_aliases(name):
+            self._add_alias(name, al)
+        for alias in normalised:
+            for al in all_aliases(alias):
+                self._add_alias(name, al)
+        return name
+
     def _add_alias(self, name, alias):
         """
         Internal method for error handling while adding and alias, and finally
@@ -704,7 +2154,8 @@ class CleverDict(dict):
         for al in alias:
             for name in all_aliases(al):
                 self._add_alias(key, name)
-        self.save(name=None, value=None)
+        self._state["mutations"] += 1
+        self._call_hook("save", name=None, value=None)
 
     def delete_alias(self, alias):
         """
@@ -736,7 +2187,8 @@ class CleverDict(dict):
                 # Ignore the key, which is at the front of ._aliases:
                 if alx in list(self._aliases.keys())[1:]:
                     del self._aliases[alx]
-        self.save(name=None, value=None)
+        self._state["mutations"] += 1
+        self._call_hook("save", name=None, value=None)
 
     def setattr_direct(self, name, value):
         """
@@ -754,8 +2206,9 @@ class CleverDict(dict):
             value of the attribute
         """
         super().__setattr__(name, value)
+        self._state["mutations"] += 1
         if name not in CleverDict.ignore_internals:
-            self.save(name, value)
+            self._call_hook("save", name, value)
 
     def to_list(self, ignore=None, exclude=None, only=None):
         """
@@ -782,8 +2235,117 @@ class CleverDict(dict):
 
         """
         ignore, only = _preprocess_options(ignore, exclude, only)
-        mapping = self._filtered_mapping(ignore, only)
-        return [(k, v) for k, v in mapping.items()]
+
+        def export():
+            return list(self._filtered_mapping(ignore, only).items())
+
+        return self._export(("list",), ignore, only, export, list)
+
+    def _key_index(self):
+        """
+        Internal method
+        Returns (keys, positions): the keys in insertion order and a dict of
+        their positions.  Built on first use, extended as keys are added and
+        rebuilt after deletions.
+        """
+        state = self._state
+        index = state.get("key_positions")
+        if index is None:
+            keys = list(dict.keys(self))
+            index = state["key_positions"] = (keys, {k: i for i, k in enumerate(keys)})
+        else:
+            keys, positions = index
+            added = dict.__len__(self) - len(keys)
+            if added:
+                for k in reversed(list(itertools.islice(reversed(dict.keys(self)), added))):
+                    positions[k] = len(keys)
+                    keys.append(k)
+        return index
+
+    def _key_range(self, start_key=None, stop_key=None):
+        """
+        Internal method
+        Returns the keys from start_key up to (but not including) stop_key.
+        """
+        if "expiry" in self._state:
+            self.expire()
+        keys, positions = self._key_index()
+        start = 0 if start_key is None else positions[self.get_key(start_key)]
+        stop = len(keys) if stop_key is None else positions[self.get_key(stop_key)]
+        return keys[start:stop]
+
+    def create_index(self, name, key_func=None):
+        """
+        Creates (or replaces) a secondary index of the items by value, which
+        is kept up to date as items change, for use with .find(),
+        .find_range() and .top().
+
+        Parameters
+        ----------
+        name: str
+            Name of the index, used in queries
+
+        key_func: function
+            Returns what to index for each value, e.g. lambda v: v["email"].
+            Must accept every value and return something hashable (and
+            orderable, for .find_range() and .top()).  Default: the value.
+        """
+        index = ValueIndex(key_func)
+        for k, v in self.items():
+            index.replace(k, index.indexed(v))
+        indexes = self._state.get("indexes")
+        if indexes is None:
+            indexes = self._state["indexes"] = {}
+        indexes[name] = index
+
+    def drop_index(self, name):
+        """
+        Deletes the secondary index name created with .create_index()
+        """
+        del self._state["indexes"][name]
+
+    def find(self, index, value):
+        """
+        Returns a list of the keys whose value is indexed as value by the
+        secondary index named index (see .create_index()), in the order they
+        were given that value.
+        """
+        return self._state["indexes"][index].find(value)
+
+    def find_range(self, index, low=None, high=None):
+        """
+        Returns a list of the keys whose indexed values are between low and
+        high (inclusive; None for no limit), in order of indexed value.
+        """
+        return self._state["indexes"][index].find_range(low, high)
+
+    def top(self, index, k=10, largest=True):
+        """
+        Returns a list of the (up to) k keys with the largest (or if largest
+        is False, smallest) indexed values, largest (smallest) first.
+        """
+        return self._state["indexes"][index].top(k, largest)
+
+    def position(self, name):
+        """
+        Returns the position (in insertion order, from 0) of a key or alias.
+        """
+        return self._key_index()[1][self.get_key(name)]
+
+    def slice(self, start_key=None, stop_key=None):
+        """
+        Returns a new CleverDict of the items from start_key up to (but not
+        including) stop_key, in insertion order, e.g. for paging.
+
+        Parameters
+        ----------
+        start_key: any
+            Key or alias of the first item (default: the first item)
+
+        stop_key: any
+            Key or alias of the item to stop before (default: to the end)
+        """
+        return CleverDict({k: self._value(k) for k in self._key_range(start_key, stop_key)})
 
     def to_dict(self, ignore=None, exclude=None, only=None):
         """
@@ -805,7 +2367,151 @@ class CleverDict(dict):
         dict
         """
         ignore, only = _preprocess_options(ignore, exclude, only)
-        return self._filtered_mapping(ignore=ignore, only=only)
+        return self._export(
+            ("dict",), ignore, only, lambda: self._filtered_mapping(ignore, only), dict
+        )
+
+    def publish(self, name):
+        """
+        Publishes a read-only snapshot of the items and aliases in shared
+        memory, which any process on this machine can use without its own copy
+        via SharedCleverDict.attach(name).  Publishing again under the same
+        name replaces the snapshot; readers switch to it on their next access.
+
+        Values must be JSON serialisable, as for .to_json().
+
+        Parameters
+        ----------
+        name: str
+            Name of the shared memory block (keep it short for macOS).
+
+        Returns
+        -------
+        The published snapshot : SharedCleverDict
+        """
+        return SharedCleverDict.publish(self, name)
+
+    def freeze(self):
+        """
+        Returns an immutable, hashable FrozenCleverDict with the same items,
+        aliases and direct attributes, e.g. to share between threads without
+        locks or to use as a cache key.  Any expired items are deleted first.
+
+        The item and alias tables are copied whole rather than each key (and
+        its aliases) being added again; see FrozenCleverDict.thaw() to get a
+        mutable CleverDict back.
+        """
+        self.expire()
+        return FrozenCleverDict(self)
+
+    def _tables(self):
+        """
+        Internal method
+        Returns (items, aliases, direct attributes, normaliser) for ._copy_tables().
+        """
+        return self, self._aliases, self._vars, self._state.get("normaliser")
+
+    def _copy_tables(self, items, aliases, attributes, normaliser):
+        """
+        Internal method
+        Fills this new, empty object with items, aliases, direct attributes
+        and normaliser (or policy) as returned by ._tables(), without calling
+        any hooks.
+        """
+        dict.update(self, items)
+        if normaliser is not None:
+            self._state["normaliser"] = Normaliser.compile(normaliser)
+        _dict = vars(self)
+        _dict.update(attributes)
+        _dict["_aliases"] = AliasesDict(aliases)
+
+    @classmethod
+    def _from_tables(cls, *tables):
+        """
+        Internal method
+        Returns a new object filled by ._copy_tables(*tables), e.g. when unpickling.
+        """
+        result = cls.__new__(cls)
+        result._copy_tables(*tables)
+        return result
+
+    def view(self, only=None, ignore=None, exclude=None):
+        """
+        Returns a read-only CleverView of the items, which reflects all later
+        changes and doesn't copy anything, e.g. to pass a large CleverDict
+        through an API or to json.dump().
+
+        Parameters
+        ----------
+        The same (mutually exclusive) only=, ignore= and exclude= as exports,
+        including a Filter.
+        """
+        return CleverView(self, Filter(only=only, ignore=ignore, exclude=exclude))
+
+    @classmethod
+    def filter(cls, only=None, ignore=None, exclude=None):
+        """
+        Returns a Filter which can be passed as only=, ignore= or exclude= to
+        exports and constructors, and which is much cheaper than a list when
+        the same selection is applied many times.
+
+        Parameters
+        ----------
+        The same (mutually exclusive) only=, ignore= and exclude= as exports.
+        """
+        return Filter(only=only, ignore=ignore, exclude=exclude)
+
+    def cache_exports(self, maxsize=16):
+        """
+        Switches on caching of .to_json(), .to_dict(), .to_list() and
+        .to_lines() output for this instance, e.g. for a web server which
+        sends the same CleverDict many times between changes.
+
+        Parameters
+        ----------
+        maxsize: int
+            Most outputs (different formats and ignore/only/fullcopy
+            arguments) to keep; the least recently used is dropped first.
+            0 switches caching off.
+
+        Notes
+        -----
+        The cache is cleared by any change to the CleverDict, but not by
+        changes made inside mutable values (e.g. x.a.append(1)).
+        .to_dict() and .to_list() return a (shallow) copy of the cached output.
+        """
+        if maxsize:
+            self._state["export_cache"] = {"maxsize": maxsize, "version": None, "outputs": {}}
+        else:
+            self._state.pop("export_cache", None)
+
+    def _export(self, options, ignore, only, export, copy=None):
+        """
+        Internal method
+        Returns export(), from the cache switched on by .cache_exports() if
+        possible, with options (format etc.) and ignore/only as the cache key.
+        """
+        state = self._state
+        if "expiry" in state:
+            self.expire()
+        cache = state.get("export_cache")
+        if cache is None:
+            return export()
+        if cache["version"] != state["mutations"]:
+            cache["outputs"].clear()
+            cache["version"] = state["mutations"]
+        outputs = cache["outputs"]
+        if isinstance(only, Filter):
+            key = options + (only,)
+        else:
+            key = options + (frozenset(ignore), None if only is None else frozenset(only))
+        output = outputs.pop(key, _missing)
+        if output is _missing:
+            output = export()
+            if len(outputs) >= cache["maxsize"]:
+                del outputs[next(iter(outputs))]
+        outputs[key] = output
+        return output if copy is None else copy(output)
 
     @classmethod
     def fromkeys(cls, iterable, value, ignore=None, exclude=None, only=None):
@@ -845,7 +2551,16 @@ class CleverDict(dict):
             iterable = {k: value for k in iterable if k in only}
         return CleverDict({k: value for k in iterable})
 
-    def to_lines(self, file_path=None, start_from_key=None, ignore=None, exclude=None, only=None):
+    def to_lines(
+        self,
+        file_path=None,
+        start_from_key=None,
+        ignore=None,
+        exclude=None,
+        only=None,
+        stop_key=None,
+        compression=None,
+    ):
         """
         Creates a line ("\n") delimited string or file using values for lines.
 
@@ -856,6 +2571,10 @@ class CleverDict(dict):
             confused with slicing e.g. x[0] will fail for x = CleverDict({1:1})
             String keys allow for keys/aliases to be references e.g. "Footnote"
 
+        stop_key: int | str
+            The key (or alias) of the line to stop before, e.g. to export one
+            page of lines at a time.  Default: export to the end.
+
         ignore: iterable | str
             Any keys/aliases to ignore from output.  Ignoring an alias ignores
             all other aliases and the primary key; likewise ignoring the key.
@@ -869,28 +2588,36 @@ class CleverDict(dict):
         file_path: str | pathlib.Path
             Path to the file (if any) to save to.
 
+        compression: "gzip" | "bz2" | "lzma" | None
+            Compress the file (or the bytes returned) with this standard
+            library module.
+
         Returns
         -------
         values joined by "\n" (if file_path is not specified) : str
+        (or compressed bytes, if compression is specified)
         None (if file_path is specified)
         """
         ignore, only = _preprocess_options(ignore, exclude, only)
-        mapping = self._filtered_mapping(ignore, only)
-        if start_from_key is None:
-            start_from_key = self.get_aliases()[0]
-        else:
-            try:
-                start_from_key = self._aliases[start_from_key]
-            except KeyError:
-                raise
-        lines = {}
-        for k, v in mapping.items():
-            if k == start_from_key or lines:
-                lines.update({k: v})
-        lines = "\n".join(lines.values())
+
+        def export():
+            if isinstance(only, Filter):
+                ignored, only_keys = only.ignored_keys(self), only.only
+            else:
+                ignored = {self._aliases.get(alias, alias) for alias in ignore}
+                only_keys = only
+            return "\n".join(
+                self._value(k)
+                for k in self._key_range(start_from_key, stop_key)
+                if k not in ignored and (only_keys is None or k in only_keys)
+            )
+
+        lines = self._export(("lines", start_from_key, stop_key), ignore, only, export)
         if not file_path:
-            return lines
-        with open(file_path, "w", encoding="utf-8") as file:
+            if compression is None:
+                return lines
+            return _compression_module(compression).compress(lines.encode("utf-8"))
+        with _open_text(file_path, "w", compression) as file:
             file.write(lines)
 
     @classmethod
@@ -909,11 +2636,12 @@ class CleverDict(dict):
 
         Parameters
         ----------
-        lines: str
-            Text values separated by "\n"
+        lines: str | bytes
+            Text values separated by "\n", or bytes from .to_lines(compression=)
 
         file_path: str | pathlib.Path
-            Path to the file (if any) to load from.
+            Path to the file (if any) to load from.  Compressed files (see
+            .to_lines(compression=)) are detected and decompressed.
 
         start_from_key: int
             The  (numeric) key to start the data dictionary with.  Default=1.
@@ -945,8 +2673,10 @@ class CleverDict(dict):
         if not (lines or file_path):
             raise ValueError("neither lines nor file_path specified")
         if file_path:
-            with open(file_path, "r", encoding="utf-8") as file:
+            with _open_text(file_path, "r") as file:
                 lines = file.read()
+        else:
+            lines = _decompress(lines)
         index = {k + start_from_key: v.strip() for k, v in enumerate(lines.split("\n"))}
         if only is not None:
             index = {k: v for k, v in index.items() if v in only}
@@ -954,8 +2684,15 @@ class CleverDict(dict):
             index = {k: v for k, v in index.items() if v not in ignore}
         return cls(index)
 
-    def to_json(self, file_path=None, fullcopy=False, ignore=None, exclude=None, only=None):
-
+    def to_json(
+        self,
+        file_path=None,
+        fullcopy=False,
+        ignore=None,
+        exclude=None,
+        only=None,
+        compression=None,
+    ):
         """
         Generates a JSON formatted string representing the CleverDict data and
         optionally saves to file.
@@ -978,9 +2715,14 @@ class CleverDict(dict):
         only: iterable | str
             Only return output for specified keys
 
+        compression: "gzip" | "bz2" | "lzma" | None
+            Compress the file (or the bytes returned) with this standard
+            library module.
+
         Returns
         -------
         JSON formatted string if no file_path supplied : str
+        (or compressed bytes, if compression is specified)
         None if file_path is supplied
 
         Notes
@@ -988,17 +2730,20 @@ class CleverDict(dict):
         Derived only from dictionary data if fullcopy==False
         Includes ._aliases and ._vars if fullcopy==True
         """
+        import json
+
+        start = perf_counter()
         ignore, only = _preprocess_options(ignore, exclude, only)
-        mapping = self._filtered_mapping(ignore, only)
 
-        if not fullcopy:
-            json_str = json.dumps(mapping, indent=4)
-        else:
+        def export():
+            mapping = self._filtered_mapping(ignore, only)
+            if not fullcopy:
+                return json.dumps(mapping, indent=4)
             _aliases = {k: v for k, v in self._aliases.items() if k not in self and v in mapping}
             _mapping_encoded = {repr(k): v for k, v in mapping.items()}
             _aliases = {k: v for k, v in _aliases.items() if k != v}
             _vars = {k: v for k, v in vars(self).items() if k not in ignore}
-            json_str = json.dumps(
+            return json.dumps(
                 {
                     "_mapping_encoded": _mapping_encoded,
                     "_aliases": _aliases,
@@ -1006,10 +2751,19 @@ class CleverDict(dict):
                 },
                 indent=4,
             )
+
+        json_str = self._export(("json", bool(fullcopy)), ignore, only, export)
         if file_path:
-            with open(Path(file_path), "w", encoding="utf-8") as file:
+            with _open_text(file_path, "w", compression) as file:
                 file.write(json_str)
-        else:
+        elif compression is not None:
+            json_str = _compression_module(compression).compress(json_str.encode("utf-8"))
+        if CleverDict.instrumentation is not None:
+            nbytes = None
+            if file_path:
+                nbytes = os.path.getsize(file_path) if compression else len(json_str.encode())
+            CleverDict.instrumentation.record_io("to_json", self, perf_counter() - start, nbytes)
+        if not file_path:
             return json_str
 
     @classmethod
@@ -1021,10 +2775,12 @@ class CleverDict(dict):
         Parameters
         ----------
         file_path: str | pathlib.Path
-            Path to the file (if any) to save to.
+            Path to the file (if any) to load from.  Compressed files (see
+            .to_json(compression=)) are detected and decompressed.
 
-        json_data: str
+        json_data: str | bytes
             JSON formatted string, typically created by json.dumps() : str
+            or bytes from .to_json(compression=)
 
         ignore: iterable | str
             Any keys/aliases to ignore from output.  Ignoring an alias ignores
@@ -1040,39 +2796,115 @@ class CleverDict(dict):
         -------
         New CleverDict: CleverDict
         """
+        import json
+
+        start = perf_counter()
         ignore, only = _preprocess_options(ignore, exclude, only)
-        kwargs = {"ignore": ignore, "only": only}
+        kwargs = {"only": only} if isinstance(only, Filter) else {"ignore": ignore, "only": only}
         if json_data and file_path:
             raise ValueError("both json_data and file_path specified")
         if not (json_data or file_path):
             raise ValueError("neither json_data nor file_path specified")
         if file_path:
-            with open(file_path, "r", encoding="utf-8") as file:
+            with _open_text(file_path, "r") as file:
                 data = json.load(file)
         else:
-            data = json.loads(json_data)
+            data = json.loads(_decompress(json_data))
         if set(data.keys()) == {"_mapping_encoded", "_aliases", "_vars"}:
             mapping = {eval(k): v for k, v in data["_mapping_encoded"].items()}
             _aliases = {k: v for k, v in data["_aliases"].items()}
             _vars = data["_vars"]
-            return cls(mapping, _aliases=AliasesDict(_aliases), _vars=_vars, **kwargs)
+            result = cls(mapping, _aliases=AliasesDict(_aliases), _vars=_vars, **kwargs)
         else:
-            return cls(data, **kwargs)
+            result = cls(data, **kwargs)
+        if CleverDict.instrumentation is not None:
+            CleverDict.instrumentation.record_io("from_json", cls, perf_counter() - start)
+        return result
+
+    @classmethod
+    def get_save_dir(cls):
+        """
+        Returns CleverDict.save_dir as a Path (by default the Operating
+        System's settings folder, found once per process), creating it if needed.
+        """
+        from pathlib import Path
+
+        directory = _save_dirs.get(cls.save_dir)
+        if directory is None:
+            directory = Path(cls.save_dir or get_app_dir("CleverDict"))
+            directory.mkdir(parents=True, exist_ok=True)
+            _save_dirs[cls.save_dir] = directory
+        return directory
 
     @classmethod
     def get_new_save_path(cls):
         """
-        Get Operating System specific default for settings folder;
-        Return a (hopefully) unique filename comprising time and variable name
+        Returns a new, unique path for an autosave file in .get_save_dir()
+
+        The name is the time, process id and a count of the paths this process
+        has returned, so it never repeats, in one of save_shards subfolders
+        chosen by its hash,
+        e.g. 7f/2020-12-06-03-30-57-892234-1234-0.json
+        """
+        import zlib
+        from datetime import datetime
+
+        id = f"{str(datetime.now()).translate(_timestamp)}-{os.getpid()}-{next(_save_ids)}"
+        if not cls.save_shards:
+            return cls.get_save_dir() / f"{id}.json"
+        shard = zlib.crc32(id.encode()) % cls.save_shards
+        directory = _save_dirs.get((cls.save_dir, shard))
+        if directory is None:
+            directory = cls.get_save_dir() / f"{shard:02x}"
+            directory.mkdir(exist_ok=True)
+            _save_dirs[cls.save_dir, shard] = directory
+        return directory / f"{id}.json"
+
+    @classmethod
+    def prune_save_files(cls, max_age=None, max_files=None):
+        """
+        Deletes old autosave (.json and compressed .json) files from .get_save_dir() and its
+        subfolders, e.g. those left behind by programs which have finished.
+
+        Parameters
+        ----------
+        max_age: float | None
+            Delete files last changed more than this many seconds ago.
+
+        max_files: int | None
+            Delete all but the max_files most recently changed files.
 
-        e.g. 2020-12-06-03-30-57-892234.json
+        Returns
+        -------
+        The paths of the files deleted : list
         """
-        timestamp = "".join([x if x.isnumeric() else "-" for x in str(datetime.now())])
-        id = f"{timestamp}.json"
-        dir = Path(get_app_dir("CleverDict"))
-        if not dir.is_dir():
-            dir.mkdir(parents=True)
-        return dir / id
+        import time
+        from pathlib import Path
+
+        suffixes = (".json",) + tuple(f".json{ext}" for _, ext in _compressions.values())
+        files = []
+        folders = [cls.get_save_dir()]
+        for folder in folders:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        if folder is folders[0]:  # i.e. a shard folder
+                            folders.append(Path(entry.path))
+                    elif entry.name.endswith(suffixes):
+                        files.append((entry.stat().st_mtime, Path(entry.path)))
+        files.sort(reverse=True)
+        oldest = None if max_age is None else time.time() - max_age
+        deleted = []
+        for i, (mtime, path) in enumerate(files):
+            if (max_files is not None and i >= max_files) or (
+                oldest is not None and mtime < oldest
+            ):
+                try:
+                    path.unlink()
+                except FileNotFoundError:  # already deleted by another process
+                    continue
+                deleted.append(path)
+        return deleted
 
     def create_save_file(self):
         """
@@ -1088,7 +2920,7 @@ class CleverDict(dict):
             os.makedirs(self.save_path.parent)
         except FileExistsError:
             pass
-        with open(self.save_path, "w", encoding="utf-8") as file:
+        with _open_text(self.save_path, "w", self._state.get("compression")) as file:
             file.write('{"empty": True}')
 
     def set_autosave(self, savefunc=None):
@@ -1102,6 +2934,9 @@ class CleverDict(dict):
             If no function specified, resets to original (inactive) method.
             The function header should be (name, value)
         """
+        import inspect
+        import types
+
         if savefunc is None:
             savefunc = CleverDict.original_save
         params = tuple(list(inspect.signature(savefunc).parameters.keys())[1:])
@@ -1121,6 +2956,9 @@ class CleverDict(dict):
             The function header should be (name)
 
         """
+        import inspect
+        import types
+
         if deletefunc is None:
             deletefunc = CleverDict.original_delete
         params = tuple(list(inspect.signature(deletefunc).parameters.keys())[1:])
@@ -1128,7 +2966,16 @@ class CleverDict(dict):
             raise TypeError(f"delete function signature not (name), but ({', '.join(params)})")
         super().__setattr__("delete", types.MethodType(deletefunc, CleverDict))
 
-    def autosave(self, fullcopy=False, silent=False):
+    def autosave(
+        self,
+        fullcopy=False,
+        silent=False,
+        database=None,
+        namespace=None,
+        lock=False,
+        save_path=None,
+        compression=None,
+    ):
         """Toggles autosave to a config file.
 
         Parameters
@@ -1142,7 +2989,30 @@ class CleverDict(dict):
         silent: bool
             False -> Print confirmations and file path
             True -> No confirmationor file path printed
+
+        database: str | pathlib.Path | True
+            Autosave items to one row per key in this SQLite database instead
+            (True for CleverDict.db in the settings folder); see SQLiteStore.
+            Restore with CleverDict.load(namespace, database).
+
+        namespace: str
+            Name of this CleverDict's rows in database.  Default: a new unique id.
+
+        lock: bool
+            True -> Merge each change into the file under a FileLock instead
+            of rewriting it, so several processes can autosave to the same
+            save_path without losing each other's changes.
+
+        save_path: str | pathlib.Path
+            File to autosave to.  Default: a new file in the settings folder.
+
+        compression: "gzip" | "bz2" | "lzma" | None
+            Compress the file with this standard library module, adding its
+            usual extension (e.g. .json.gz) to save_path.
         """
+        import types
+        from pathlib import Path
+
         if fullcopy == "off":
             try:
                 self.set_autosave()
@@ -1151,17 +3021,44 @@ class CleverDict(dict):
                     print("\n ⚠  Autosave disabled.")
                     print(f"\nⓘ  Previous updates saved to:\n  {self.save_path}\n")
                 del self.save_path
+                for setting in ("store", "namespace", "compression"):
+                    self._state.pop(setting, None)
             except AttributeError as E:
                 # Attempted to turn autosave off before it was ever enabled
                 print(f"\n ⚠  Error with autosave(fullcopy=off): {E}")
                 return
+        elif database is not None:
+            import uuid
+
+            if fullcopy or compression:
+                raise ValueError("fullcopy=True and compression= can't be used with database=")
+            store = SQLiteStore.open(None if database is True else database)
+            self._autosave_to_store(store, namespace or uuid.uuid4().hex)
+            self._call_hook("save", name=None, value=None)
+            if not silent:
+                print(f"\n ⚠  Autosaving to:\n  {store.path} ({self.save_namespace})\n")
         else:
-            path = self.get("save_path") or self.get_new_save_path()
-            path = path.with_suffix(".json")
-            self.setattr_direct("save_path", Path(path))
-            if not path.is_file():
+            if lock and fullcopy:
+                raise ValueError("fullcopy=True can't be used with lock=True")
+            if compression is not None:
+                _compression_module(compression)  # i.e. check it's supported
+            extension = _compressions[compression][1] if compression else ""
+            path = Path(save_path or self.get("save_path") or self.get_new_save_path())
+            if path.suffix in {extension for _, extension in _compressions.values()}:
+                path = path.with_suffix("")
+            path = path.with_suffix(".json" + extension)
+            self.setattr_direct("save_path", path)
+            if compression:
+                self._state["compression"] = compression
+            else:
+                self._state.pop("compression", None)
+            if not (lock or path.is_file()):
                 self.create_save_file()
-            if fullcopy:
+            if lock:
+                # Merged into the file, which is created by the first save:
+                super().__setattr__("save", types.MethodType(CleverDict._auto_save_merge, self))
+                super().__setattr__("delete", types.MethodType(CleverDict._auto_delete_merge, self))
+            elif fullcopy:
                 # Save and delete events trigger a call to the same method:
                 super().__setattr__("save", types.MethodType(CleverDict._auto_save_fullcopy, self))
                 super().__setattr__(
@@ -1170,10 +3067,90 @@ class CleverDict(dict):
             else:
                 super().__setattr__("save", types.MethodType(CleverDict._auto_save_data, self))
                 super().__setattr__("delete", types.MethodType(CleverDict._auto_save_data, self))
-            self.save(name=None, value=None)
+            self._call_hook("save", name=None, value=None)
             if not silent:
                 print(f"\n ⚠  Autosaving to:\n  {path}\n")
 
+    @classmethod
+    def load(cls, namespace, database=True):
+        """
+        Restores a CleverDict autosaved with .autosave(database=, namespace=),
+        which carries on autosaving to the same rows.
+
+        Parameters
+        ----------
+        namespace: str
+            As .save_namespace of the CleverDict saved
+
+        database: str | pathlib.Path | True
+            The SQLite database file (True for CleverDict.db in the settings folder)
+
+        Returns
+        -------
+        New CleverDict: CleverDict
+        """
+        store = SQLiteStore.open(None if database is True else database)
+        result = cls(store.load(namespace))
+        result._autosave_to_store(store, namespace)
+        return result
+
+    @property
+    def save_namespace(self):
+        """
+        The name of this CleverDict's rows in the database it autosaves to
+        (see .autosave(database=)).  Otherwise an item called save_namespace,
+        if there is one.
+        """
+        try:
+            return self._state["namespace"]
+        except KeyError:
+            raise AttributeError("save_namespace") from None  # i.e. try __getattr__
+
+    def _autosave_to_store(self, store, namespace):
+        """
+        Internal method
+        Sets the .save/.delete methods to save to namespace in store (a SQLiteStore).
+        """
+        import types
+
+        self._state["store"] = store
+        self._state["namespace"] = namespace
+        self.setattr_direct("save_path", store.path)
+        super().__setattr__("save", types.MethodType(CleverDict._auto_save_row, self))
+        super().__setattr__("delete", types.MethodType(CleverDict._auto_delete_row, self))
+
+    def _auto_save_row(self, name=None, value=None):
+        """
+        Internal method
+
+        If .autosave(database=...) is called on an object, this method
+        overwrites the default .save() method and upserts the row of the key
+        changed (or with name None, replaces all the rows of the object).
+        Direct attributes (see .setattr_direct()) aren't saved.
+        """
+        start = perf_counter()
+        store, namespace = self._state["store"], self._state["namespace"]
+        if name is None:
+            nbytes = store.replace(namespace, self)
+        elif not dict.__contains__(self, name):
+            return
+        else:
+            nbytes = store.save(namespace, name, value)
+        if CleverDict.instrumentation is not None:
+            CleverDict.instrumentation.record_io("autosave", self, perf_counter() - start, nbytes)
+
+    def _auto_delete_row(self, name=None):
+        """
+        Internal method
+        The .delete() method set by .autosave(database=...); deletes the row
+        of name (or with name None, all the rows of the object).
+        """
+        store, namespace = self._state["store"], self._state["namespace"]
+        if name is None:
+            store.drop(namespace)
+        else:
+            store.delete(namespace, name)
+
     def _auto_save_data(self, name=None, value=None):
         """
         Internal method
@@ -1188,8 +3165,10 @@ class CleverDict(dict):
         """
         if not hasattr(self, "save_path"):
             path = self.get_new_save_path().with_suffix(".json")
-            self.setattr_direct("save_path", Path(path))
-        self.to_json(file_path=self.save_path)
+            self.setattr_direct("save_path", path)
+        start = perf_counter()
+        self.to_json(file_path=self.save_path, compression=self._state.get("compression"))
+        self._record_autosave(start)
 
     def _auto_save_fullcopy(self, name=None, value=None):
         """
@@ -1218,5 +3197,731 @@ class CleverDict(dict):
         """
         if not hasattr(self, "save_path"):
             path = self.get_new_save_path().with_suffix(".json")
-            self.setattr_direct("save_path", Path(path))
-        self.to_json(file_path=self.save_path, fullcopy=fullcopy)
+            self.setattr_direct("save_path", path)
+        start = perf_counter()
+        compression = self._state.get("compression")
+        self.to_json(file_path=self.save_path, fullcopy=fullcopy, compression=compression)
+        self._record_autosave(start)
+
+    def _auto_save_merge(self, name=None, value=None):
+        """
+        Internal method
+
+        If .autosave(lock=True) is called on an object, this method overwrites
+        the default .save() method and merges the change (or with name None,
+        all the items) into the file at .save_path.  Direct attributes (see
+        .setattr_direct()) aren't saved.
+        """
+        import json
+
+        if name is not None and not dict.__contains__(self, name):
+            return
+        items = self.to_dict() if name is None else {name: value}
+        # Encoded before taking the lock, and with the keys JSON will save:
+        self._merge_into_file(json.loads(json.dumps(items)))
+
+    def _auto_delete_merge(self, name=None):
+        """
+        Internal method
+        The .delete() method set by .autosave(lock=True).
+        """
+        import json
+
+        self._merge_into_file({}, deleted=json.loads(json.dumps({name: None})))
+
+    def _merge_into_file(self, items, deleted=()):
+        """
+        Internal method
+
+        Under a FileLock, re-reads the JSON file at .save_path (unless it's
+        unchanged since this object last wrote it), updates items and deletes
+        the keys in deleted, then atomically replaces the file.  Items other
+        processes saved meanwhile are kept.
+        """
+        import json
+
+        start = perf_counter()
+        path = self.save_path
+        with FileLock(f"{path}.lock"):
+            signature = _file_signature(path)
+            merged = self._state.get("merged")
+            if merged is None or merged[0] != signature:
+                if signature is None:
+                    merged = (None, {})
+                else:
+                    with _open_text(path, "r") as file:
+                        merged = (signature, json.load(file))
+            data = merged[1]
+            data.update(items)
+            for key in deleted:
+                data.pop(key, None)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with _open_text(temp_path, "w", self._state.get("compression")) as file:
+                json.dump(data, file, indent=4)
+            os.replace(temp_path, path)
+            self._state["merged"] = (_file_signature(path), data)
+        self._record_autosave(start)
+
+    def watch(self, file_path=None, interval=None, on_error=None):
+        """
+        Starts watching a JSON file (e.g. one edited by hand) for changes,
+        which .poll() then applies to this object.
+
+        Parameters
+        ----------
+        file_path: str | pathlib.Path
+            The file to watch.  Default: .save_path
+
+        interval: float | None
+            Seconds between calls of .poll() by a background (daemon) thread.
+            None for no thread, i.e. call .poll() yourself.
+
+        on_error: function
+            Called with any exception raised by .poll() in the background
+            thread, which then carries on polling.  Default: issue a
+            RuntimeWarning.
+        """
+        import json
+        import threading
+        from pathlib import Path
+
+        self.unwatch()
+        path = Path(file_path or self.save_path)
+        signature, data = _file_signature(path), {}
+        if signature is not None:
+            with _open_text(path, "r") as file:
+                data = _decode_json(json.load(file))
+        stop = threading.Event()
+        self._state["watch"] = [path, signature, data, stop]
+        if interval is not None:
+
+            def poll():
+                while not stop.wait(interval):
+                    try:
+                        self.poll()
+                    except Exception as error:
+                        if on_error is not None:
+                            on_error(error)
+                        else:
+                            import warnings
+
+                            warnings.warn(f"error polling {path}: {error!r}", RuntimeWarning)
+
+            threading.Thread(target=poll, daemon=True).start()
+
+    def unwatch(self):
+        """
+        Stops watching the file given to .watch() (if any).
+        """
+        watch = self._state.pop("watch", None)
+        if watch is not None:
+            watch[3].set()
+
+    def poll(self):
+        """
+        Applies any changes to the file being watched (see .watch()).
+
+        The file is only read if its modification time, size or inode has
+        changed, and only the items which changed in the file since it was
+        last read are set or deleted (via the usual .save/.delete methods),
+        so changes made to this object in the meantime are kept.  Keys JSON
+        saves as strings (e.g. 1 as "1") are matched to the existing keys.
+        If applying a change raises an error, the same changes are tried
+        again by the next call.
+
+        Returns
+        -------
+        The keys set or deleted : list
+        """
+        import json
+
+        watch = self._state["watch"]
+        path, signature, old, _ = watch
+        new_signature = _file_signature(path)
+        if new_signature == signature:
+            return []
+        new = {}
+        if new_signature is not None:
+            try:
+                with _open_text(path, "r") as file:
+                    new = _decode_json(json.load(file))
+            except (ValueError, EOFError):  # e.g. still being written; try again next time
+                return []
+        json_keys = None
+
+        def resolve(key):
+            nonlocal json_keys
+            found = self._aliases.get(key, _missing)
+            if found is not _missing:
+                return found
+            if json_keys is None:  # i.e. {"1": 1, "true": True, "null": None ...}
+                json_keys = {
+                    json.dumps(k): k
+                    for k in dict.keys(self)
+                    if k is None or isinstance(k, (int, float))
+                }
+            return json_keys.get(key, key)
+
+        changed = []
+        for key, value in new.items():
+            if key not in old or old[key] != value:
+                key = resolve(key)
+                if not (key in self and dict.__getitem__(self, key) == value):
+                    self[key] = value
+                    changed.append(key)
+        for key in old.keys() - new.keys():
+            key = resolve(key)
+            if key in self:
+                del self[key]
+                changed.append(key)
+        # Only once the changes are applied, so that they're retried after an error:
+        watch[1:3] = [new_signature, new]
+        return changed
+
+    def _record_autosave(self, start):
+        """
+        Internal method
+
+        Records the duration of an autosave and the size of the file written,
+        if instrumentation is enabled.
+        """
+        if CleverDict.instrumentation is not None:
+            nbytes = self.save_path.stat().st_size
+            CleverDict.instrumentation.record_io("autosave", self, perf_counter() - start, nbytes)
+
+
+# Autosave .delete methods which .clear() calls once with name=None, since
+# they save all the items (or delete all the rows) anyway:
+_clear_all_hooks = {
+    CleverDict._auto_save_data,
+    CleverDict._auto_save_fullcopy,
+    CleverDict._auto_delete_row,
+}
+
+# Placeholder value of DiskCleverDict keys whose value hasn't been loaded:
+_unloaded = object()
+
+
+class DiskCleverDict(CleverDict):
+    """
+    A CleverDict whose values stay in a SQLiteStore until they're used, for
+    data larger than memory.  Created with DiskCleverDict.open().
+
+    Keys and aliases are held in memory as usual, but each value is read
+    (and decoded) from the database on first access, then kept in a bounded
+    least recently used cache; values dropped from the cache are simply read
+    again next time.  Writes and deletes autosave to the database through
+    the normal .save/.delete path, so the database is always up to date.
+    """
+
+    @classmethod
+    def open(cls, namespace, database=True, cache_size=1024, cache_bytes=None, **kwargs):
+        """
+        Opens the items autosaved under namespace in database (see
+        CleverDict.autosave(database=)), reading only their keys.
+
+        Parameters
+        ----------
+        namespace: str
+            Name of the items in database; created if it doesn't exist yet.
+
+        database: str | pathlib.Path | True
+            The SQLite database file (True for CleverDict.db in the settings folder)
+
+        cache_size: int | None
+            Maximum number of values held in memory (None for no limit)
+
+        cache_bytes: int | None
+            Maximum total sys.getsizeof() of the keys and values held in memory
+
+        kwargs:
+            Any other CleverDict arguments, e.g. normaliser=
+
+        Returns
+        -------
+        New DiskCleverDict: DiskCleverDict
+        """
+        store = SQLiteStore.open(None if database is True else database)
+        result = cls(maxsize=cache_size, max_bytes=cache_bytes, **kwargs)
+        # Add the keys (and their aliases) outside the cache and before autosave:
+        lru = result._state.pop("lru", None)
+        for key in store.keys(namespace):
+            result[key] = _unloaded
+        if lru is not None:
+            result._state["lru"] = lru
+        result._autosave_to_store(store, namespace)
+        return result
+
+    def _value(self, key):
+        value = dict.__getitem__(self, key)
+        state = self._state
+        if value is _unloaded:
+            value = state["store"].get(state["namespace"], key)
+            dict.__setitem__(self, key, value)
+            if "lru" in state:
+                self._lru_add(key, value)
+        elif "lru" in state:
+            state["lru"][0].move_to_end(key)
+        return value
+
+    def _evict(self, key):
+        lru = self._state["lru"]
+        lru[3] -= lru[0].pop(key)
+        dict.__setitem__(self, key, _unloaded)
+
+    def __getitem__(self, name):
+        return self._value(self.get_key(name))
+
+    def __getattr__(self, name):
+        if name == "_aliases":  # i.e. before __init__ created it
+            raise AttributeError(name)
+        key = self._aliases.get(name, _missing)
+        if key is _missing or not dict.__contains__(self, key):
+            raise AttributeError(repr(name))
+        return self._value(key)
+
+    def get(self, name, default=None):
+        key = self._aliases.get(name, _missing)
+        if key is _missing or not dict.__contains__(self, key):
+            return default
+        return self._value(key)
+
+    # Values are read via __getitem__, one at a time.  Overriding __iter__
+    # also stops dict(x) and {**x} copying the placeholders directly.
+    def __iter__(self):
+        return dict.__iter__(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def copy(self):
+        return dict(self.items())
+
+
+class FrozenCleverDict(CleverDict):
+    """
+    An immutable, hashable CleverDict, created with CleverDict.freeze().
+
+    Items are looked up by key or alias as usual, but anything which would
+    change the items, aliases or direct attributes raises TypeError.  Reads
+    don't change anything either (there's no expiry or LRU bookkeeping), so
+    any number of threads can share one without locks, and it can be used
+    as a dict key or memoised argument.  The hash is worked out on first use
+    and cached; like a tuple's, it needs every value to be hashable.
+    """
+
+    def __init__(self, mapping=(), **kwargs):
+        if kwargs or not isinstance(mapping, CleverDict):
+            mapping = CleverDict(mapping, **kwargs)
+        self._copy_tables(*mapping._tables())
+
+    def __hash__(self):
+        state = self._state
+        if "hash" not in state:
+            state["hash"] = hash(frozenset(dict.items(self)))
+        return state["hash"]
+
+    def thaw(self):
+        """
+        Returns a mutable CleverDict with the same items, aliases and direct
+        attributes (without adding the aliases again).
+        """
+        return CleverDict._from_tables(*self._tables())
+
+    def freeze(self):
+        return self
+
+    def copy(self):
+        return self
+
+    __copy__ = copy
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        # Rebuilt from plain copies of the tables, as unpickling would
+        # otherwise set each item via the read-only __setitem__:
+        items, aliases, attributes, normaliser = self._tables()
+        policies = None if normaliser is None else normaliser.policies
+        return self._from_tables, (dict(items), dict(aliases), attributes, policies)
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _read_only
+    update = pop = popitem = clear = setdefault = __ior__ = _read_only
+    set = add_alias = delete_alias = setattr_direct = _read_only
+    autosave = set_autosave = set_autodelete = watch = poll = _read_only
+
+
+class CleverView(dict):
+    """
+    A read-only, live view of (some of) the items of a CleverDict, created
+    with CleverDict.view().
+
+    Keys can be looked up by any of their aliases, as items or attributes,
+    and only= / ignore= are applied on access.  Although it's a dict (so it
+    can be passed to json.dump() and anything else expecting a dict), the
+    items aren't copied into it; see .__init__.
+    """
+
+    def __init__(self, obj, filter):
+        # The view's own storage holds a placeholder only, so that json.dumps()
+        # (whose C encoder writes "{}" for empty dicts without asking) calls
+        # .items().  All other access is via the methods below.
+        super().__init__({_missing: None})
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_filter", filter)
+
+    def _key(self, name):
+        """
+        Internal method
+        Returns the key for name (a key or alias) if it's in the view, or _missing.
+        """
+        key = self._obj._aliases.get(name, _missing)
+        if key is _missing or not dict.__contains__(self._obj, key):
+            return _missing
+        only = self._filter.only
+        if only is not None and key not in only:
+            return _missing
+        if key in self._filter.ignored_keys(self._obj):
+            return _missing
+        return key
+
+    def __getitem__(self, name):
+        key = self._key(name)
+        if key is _missing:
+            raise KeyError(name)
+        return self._obj._value(key)
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        key = self._key(name)
+        if key is _missing:
+            raise AttributeError(repr(name))
+        return self._obj._value(key)
+
+    def __contains__(self, name):
+        return self._key(name) is not _missing
+
+    def get(self, name, default=None):
+        key = self._key(name)
+        return default if key is _missing else self._obj._value(key)
+
+    def __iter__(self):
+        if self._filter.only is not None:
+            return iter(self._filter.keys_for(self._obj))
+        ignored = self._filter.ignored_keys(self._obj)
+        return (k for k in dict.keys(self._obj) if k not in ignored)
+
+    def __len__(self):
+        if self._filter.only is not None:
+            return len(self._filter.keys_for(self._obj))
+        ignored = self._filter.ignored_keys(self._obj)
+        return len(self._obj) - sum(dict.__contains__(self._obj, k) for k in ignored)
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def keys(self):
+        return KeysView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def items(self):
+        return ItemsView(self)
+
+    def __eq__(self, other):
+        if isinstance(other, dict):
+            return len(self) == len(other) and all(
+                k in other and other[k] == v for k, v in self.items()
+            )
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({dict(self.items())!r})"
+
+    def __reduce__(self):
+        return dict, (dict(self.items()),)
+
+    def copy(self):
+        """
+        Returns a regular dict of the items in the view
+        """
+        return dict(self.items())
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    __setitem__ = __delitem__ = __setattr__ = __delattr__ = _read_only
+    update = pop = popitem = clear = setdefault = __ior__ = _read_only
+
+
+class SharedCleverDict(Mapping):
+    """
+    A read-only snapshot of a CleverDict in shared memory, for many
+    processes to read without each holding its own copy.  Published with
+    CleverDict.publish() and attached (in any process) with
+    SharedCleverDict.attach().  It can also be pickled, e.g. to pass it to
+    multiprocessing workers, which then attach to the same memory.
+
+    Keys and aliases can be used as items or attributes, as with a
+    CleverDict.  Nothing is copied when attaching: keys are found through a
+    hash table of the aliases in the shared block, and a value is decoded
+    from JSON each time it's read.
+
+    Each version is a separate block (name_1, name_2 ...), and a small
+    control block (name) holds the current version number.  Publishing
+    writes a complete new block before updating the version number, so
+    readers never see a partly written snapshot.
+    """
+
+    # Layout of a block: the header, the items table, the alias hash table,
+    # then the keys (repr), aliases (see _alias_bytes) and values (JSON) they point to.
+    MAGIC = b"CLVDSHM1"
+    HEADER = "<8sQQ"  # MAGIC, number of items, number of hash table slots
+    ITEM = "<QIQI"  # key offset and length, value offset and length
+    SLOT = "<QII"  # alias offset and length, item number + 1 (0 for an empty slot)
+    VERSION = "<Q"  # the whole control block
+
+    # Blocks this process has published, kept open (on Windows, shared memory
+    # is freed when no process has it open): {name: (control, block)}
+    _published = {}
+
+    def __init__(self, name, control):
+        import struct
+        import zlib
+
+        self._set(
+            _name=name,
+            _control=control,
+            _structs=[struct.Struct(f) for f in (self.HEADER, self.ITEM, self.SLOT)],
+            _control_struct=struct.Struct(self.VERSION),
+            _crc32=zlib.crc32,
+            _block=None,
+            _current=0,
+        )
+        self._refresh()
+
+    def _set(self, **attributes):
+        for name, value in attributes.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Returns the snapshot published as name (by any process).
+        """
+        return cls(name, _shared_memory(name))
+
+    @classmethod
+    def publish(cls, obj, name):
+        """
+        Publishes obj (a CleverDict or any other mapping) as the next version
+        of name; see CleverDict.publish().
+        """
+        import json
+        import struct
+        import zlib
+
+        header, item, slot = (struct.Struct(f) for f in (cls.HEADER, cls.ITEM, cls.SLOT))
+        items = list(obj.items())
+        keys = [repr(k).encode() for k, _ in items]
+        values = [json.dumps(v).encode() for _, v in items]
+        positions = {k: i for i, (k, _) in enumerate(items)}
+        aliases = getattr(obj, "_aliases", None)
+        if aliases is None:  # a plain mapping, whose keys are their only aliases
+            aliases = {k: k for k in positions}
+        aliases = [(_alias_bytes(a), positions[k]) for a, k in aliases.items() if k in positions]
+        slots = 1 << max(3, (2 * len(aliases)).bit_length())  # at most half full
+        heap = header.size + len(items) * item.size + slots * slot.size
+        size = heap + sum(map(len, keys)) + sum(map(len, values)) + sum(len(a) for a, _ in aliases)
+
+        control, old = cls._published.get(name, (None, None))
+        if control is None:
+            try:
+                control = _shared_memory(name, struct.calcsize(cls.VERSION))
+            except FileExistsError:  # published before, by another process
+                control = _shared_memory(name)
+        version = struct.unpack_from(cls.VERSION, control.buf)[0] + 1
+        try:
+            block = _shared_memory(f"{name}_{version}", size)
+        except FileExistsError:  # left over from a publisher which exited early
+            _unlink_shared_memory(_shared_memory(f"{name}_{version}"))
+            block = _shared_memory(f"{name}_{version}", size)
+        buf = block.buf
+
+        def write(data):
+            nonlocal heap
+            start, heap = heap, heap + len(data)
+            buf[start:heap] = data
+            return start
+
+        header.pack_into(buf, 0, cls.MAGIC, len(items), slots)
+        key_offsets = [write(key) for key in keys]
+        value_offsets = [write(value) for value in values]
+        for i, (key, value) in enumerate(zip(keys, values)):
+            offset = header.size + i * item.size
+            item.pack_into(buf, offset, key_offsets[i], len(key), value_offsets[i], len(value))
+        table = header.size + len(items) * item.size
+        for alias, position in aliases:
+            index = zlib.crc32(alias) & (slots - 1)
+            while slot.unpack_from(buf, table + index * slot.size)[2]:
+                index = (index + 1) & (slots - 1)
+            slot.pack_into(buf, table + index * slot.size, write(alias), len(alias), position + 1)
+        struct.pack_into(cls.VERSION, control.buf, 0, version)  # the swap
+        cls._published[name] = (control, block)
+        if old is not None:
+            old.close()
+            _unlink_shared_memory(old)
+        return cls.attach(name)
+
+    def _refresh(self):
+        """
+        Internal method
+        Attaches the current version's block (if it has changed) and returns its buffer.
+        """
+        while True:
+            version = self._control_struct.unpack_from(self._control.buf)[0]
+            if not version:
+                raise FileNotFoundError(f"nothing published as {self._name!r} yet")
+            if version == self._current:
+                return self._block.buf
+            try:
+                block = _shared_memory(f"{self._name}_{version}")
+            except FileNotFoundError:
+                if self._control_struct.unpack_from(self._control.buf)[0] == version:
+                    raise  # i.e. not just replaced by a newer version
+                continue
+            magic, items, slots = self._structs[0].unpack_from(block.buf)
+            if magic != self.MAGIC:
+                block.close()
+                raise ValueError(f"{self._name}_{version} isn't a SharedCleverDict")
+            if self._block is not None:
+                self._block.close()
+            self._set(
+                _block=block,
+                _current=version,
+                _items=items,
+                _slots=slots,
+                _table=self._structs[0].size + items * self._structs[1].size,
+            )
+
+    def _find(self, name):
+        """
+        Internal method
+        Returns (buffer, item number of name (a key or alias) or -1).
+        """
+        buf = self._refresh()
+        alias = _alias_bytes(name)
+        slot = self._structs[2]
+        mask = self._slots - 1
+        index = self._crc32(alias) & mask
+        while True:
+            offset, length, item = slot.unpack_from(buf, self._table + index * slot.size)
+            end = offset + length
+            if not item or (length == len(alias) and buf[offset:end] == alias):
+                return buf, item - 1
+            index = (index + 1) & mask
+
+    def _item(self, buf, item):
+        header, item_struct = self._structs[:2]
+        return item_struct.unpack_from(buf, header.size + item * item_struct.size)
+
+    def _key(self, buf, item):
+        offset, length, _, _ = self._item(buf, item)
+        end = offset + length
+        return _decode_key(str(buf[offset:end], "utf-8"))
+
+    def _value(self, buf, item):
+        import json
+
+        _, _, offset, length = self._item(buf, item)
+        end = offset + length
+        return json.loads(str(buf[offset:end], "utf-8"))
+
+    def __getitem__(self, name):
+        buf, item = self._find(name)
+        if item < 0:
+            raise KeyError(name)
+        return self._value(buf, item)
+
+    def __getattr__(self, name):
+        if "_control" not in vars(self):  # e.g. while unpickling
+            raise AttributeError(name)
+        buf, item = self._find(name)
+        if item < 0:
+            raise AttributeError(repr(name))
+        return self._value(buf, item)
+
+    def __contains__(self, name):
+        return self._find(name)[1] >= 0
+
+    def __len__(self):
+        self._refresh()
+        return self._items
+
+    def __iter__(self):
+        buf = self._refresh()
+        return iter([self._key(buf, i) for i in range(self._items)])
+
+    def get_version(self):
+        """
+        Returns the version number of the snapshot, which goes up by one each
+        time it's published.
+        """
+        self._refresh()
+        return self._current
+
+    def get_key(self, name):
+        """
+        Returns the primary key for name (a key or alias), raising KeyError if
+        it can't be found.
+        """
+        buf, item = self._find(name)
+        if item < 0:
+            raise KeyError(name)
+        return self._key(buf, item)
+
+    def to_dict(self):
+        buf = self._refresh()
+        return {self._key(buf, i): self._value(buf, i) for i in range(self._items)}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}.attach({self._name!r})"
+
+    def __reduce__(self):
+        return SharedCleverDict.attach, (self._name,)
+
+    def close(self):
+        """
+        Detaches from the shared memory (which other processes can still use).
+        """
+        self._block.close()
+        self._control.close()
+
+    def unlink(self):
+        """
+        Frees the shared memory of the current version for all processes;
+        they can carry on reading any version they're already attached to.
+        """
+        self._refresh()
+        _unlink_shared_memory(self._block)
+        _unlink_shared_memory(self._control)
+        for block in SharedCleverDict._published.pop(self._name, ()):
+            block.close()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError(f"{self.__class__.__name__} is read-only")
+
+    __setattr__ = __delattr__ = _read_only
@@ -30,7 +30,7 @@ def comma_split(text: str):
 if __name__ == "__main__":
     setup(
         name=NAME,
-        packages=find_packages(),
+        packages=find_packages(exclude=["benchmarks", "benchmarks.*"]),
         version=VERSION,
         license=LICENSE,
         description=DESCRIPTION,
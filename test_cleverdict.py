@@ -8,7 +8,17 @@ from textwrap import dedent
 import keyring
 import pytest
 
-from cleverdict import CleverDict, Expand, all_aliases
+from cleverdict import (
+    CleverDict,
+    DiskCleverDict,
+    Expand,
+    FrozenCleverDict,
+    Normaliser,
+    SharedCleverDict,
+    SQLiteStore,
+    all_aliases,
+)
+from cleverdict.cleverdict import _unloaded
 
 
 def example_save_function(self, name=None, value=None):
@@ -264,6 +274,19 @@ CleverDict:
         del z
         assert c.info(as_str=True) == "CleverDict:\n    x['a'] == x.a == 'A'"
 
+    def test_info_file_and_limits(self):
+        from io import StringIO
+
+        y = CleverDict({"a": 1, "b": 2, "c": 3})
+        y.add_alias("b", "bee")
+        out = StringIO()
+        assert y.info(file=out, max_items=2) is None
+        assert out.getvalue() == (
+            "CleverDict:\n    y['a'] == y.a == 1\n"
+            "    y['b'] == y['bee'] == y.b == y.bee == 2\n    ... 1 more\n"
+        )
+        assert y.info(as_str=True, find_names=False).startswith("CleverDict:\n    x['a']")
+
 
 class Test_Misc:
     def test_exclude(self):
@@ -656,6 +679,27 @@ class Test_Misc:
         # when called a second time, should be different:
         assert CleverDict.get_new_save_path() != path
 
+    def test_save_dir_shards_and_prune(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(CleverDict, "save_dir", tmp_path)
+        assert CleverDict.get_save_dir() == tmp_path
+        paths = [CleverDict.get_new_save_path() for _ in range(1000)]
+        assert len(set(paths)) == 1000
+        assert all(path.parent.parent == tmp_path for path in paths)
+        assert 200 < len({path.parent for path in paths}) <= CleverDict.save_shards
+        for i, path in enumerate(paths[:10]):
+            path.write_text("{}")
+            os.utime(path, (1000 + i, 1000 + i))
+        monkeypatch.setattr(CleverDict, "save_shards", 0)
+        path = CleverDict.get_new_save_path()
+        assert path.parent == tmp_path
+        path.write_text("{}")
+        assert CleverDict.prune_save_files(max_age=3600) == paths[9::-1]  # newest first
+        assert CleverDict.prune_save_files(max_files=1) == []
+        paths[0].write_text("{}")
+        os.utime(paths[0], (1000, 1000))
+        assert CleverDict.prune_save_files(max_files=1) == [paths[0]]
+        assert path.exists()
+
     def test_get_app_dir(self):
         """
         tests whether the cleverdict implementation of get_app_dir is ok
@@ -714,6 +758,55 @@ class Test_Misc:
             == "CleverDict({'save': 'What a great save!'}, _aliases={}, _vars={})"
         )
 
+    def test_repr_limit(self, monkeypatch):
+        monkeypatch.setattr(CleverDict, "repr_limit", 2)
+        x = CleverDict({"a": 1, "b": 2})
+        assert eval(repr(x)) == x
+        x.c = 3
+        assert repr(x) == "CleverDict({'a': 1, 'b': 2, ...}, <3 items, 1 not shown>)"
+        assert repr(x) is repr(x)  # cached
+        x.a = 0
+        assert repr(x) == "CleverDict({'a': 0, 'b': 2, ...}, <3 items, 1 not shown>)"
+        assert eval(x.__repr__(full=True)) == x
+        assert x.__repr__(only=["a", "c"]) == "CleverDict({'a': 0, 'c': 3}, _aliases={}, _vars={})"
+
+    def test_pop_setdefault_clear(self):
+        log = []
+        x = CleverDict({1: "one", "b c": 2, "d": 3})
+        x.set_autodelete(lambda self, name: log.append(name))
+        assert x.pop("_1") == "one" and x.pop("_1", None) is None
+        with pytest.raises(KeyError):
+            x.pop(1)
+        assert x.setdefault("b_c", 0) == 2 and x.setdefault("e-f", 4) == 4 and x.e_f == 4
+        assert x.popitem() == ("e-f", 4)
+        x.clear()
+        assert len(x) == 0 and x.get_aliases() == []
+        assert log == [1, "e-f", "b c", "d"]
+
+    def test_clear_autosaves_once(self, tmpdir):
+        data = {f"key {i}": i for i in range(50)}
+        x = CleverDict(data)
+        x.autosave(save_path=Path(tmpdir) / "data.json", silent=True)
+        stats = CleverDict.enable_instrumentation(slow_hook=None)
+        try:
+            x.clear()
+            calls = stats.to_dict()["counters"]["hook_calls"]
+        finally:
+            CleverDict.disable_instrumentation()
+        assert [c["value"] for c in calls if c["labels"]["hook"] == "delete"] == [1]
+        assert json.loads(get_data(x.save_path)) == {}
+        y = CleverDict(data)
+        y.autosave(database=Path(tmpdir) / "data.db", namespace="y", silent=True)
+        y.clear()
+        assert y._state["store"].load("y") == {}
+        path = Path(tmpdir) / "shared.json"
+        z = CleverDict(data)
+        other = CleverDict({"kept": True})
+        z.autosave(lock=True, save_path=path, silent=True)
+        other.autosave(lock=True, save_path=path, silent=True)
+        z.clear()
+        assert json.loads(get_data(path)) == {"kept": True}
+
 
 class Test_Internal_Logic:
     def test_raises_error(self):
@@ -726,6 +819,422 @@ class Test_Internal_Logic:
         with pytest.raises(KeyError):
             x["a"]
 
+    def test_get_resolves_aliases(self):
+        x = CleverDict({1: "one", "what?": "huh"})
+        assert x.get(1) == x.get("_1") == x.get("_True") == "one"
+        assert x.get("what_") == "huh"
+        assert x.get("nope") is None
+        assert x.get("nope", "default") == "default"
+        with Expand(False):
+            y = CleverDict({1: "one"})
+        assert y.get("_1", 0) == 0
+
+    def test_version(self):
+        x = CleverDict({"a": 1})
+        versions = [x.get_version()]
+        for change in (
+            lambda: setattr(x, "a", 2),
+            lambda: x.add_alias("a", "alpha"),
+            lambda: x.delete_alias("alpha"),
+            lambda: x.setattr_direct("direct", 1),
+            lambda: x.pop("a"),
+        ):
+            change()
+            versions.append(x.get_version())
+        assert versions == sorted(set(versions))
+        assert CleverDict({"a": 1}) == CleverDict({"b": 0, "a": 1}, ignore="b")
+
+    def test_fingerprint(self):
+        x = CleverDict({"a": 1, "b": [2]})
+        y = CleverDict({"b": [2], "a": 1})
+        assert x.fingerprint() == y.fingerprint()
+        x.c = 3
+        assert x.fingerprint() != y.fingerprint()
+        del x.c
+        assert x.fingerprint() == y.fingerprint()
+        x.a = 0
+        assert x.fingerprint() == CleverDict(x.to_dict()).fingerprint()
+        x.b.append(3)  # not seen until b is replaced or deleted
+        x.b = [9]
+        assert x.fingerprint() == CleverDict({"a": 0, "b": [9]}).fingerprint()
+        x.b.append(3)
+        del x.b
+        assert x.fingerprint() == CleverDict({"a": 0}).fingerprint()
+        x.clear()
+        assert x.fingerprint() == CleverDict().fingerprint() == 0
+
+    def test_cache_exports(self):
+        x = CleverDict({"a": 1, "b": 2})
+        x.cache_exports(maxsize=2)
+        json_str = x.to_json()
+        assert x.to_json() is json_str
+        assert x.to_json(ignore="b") is x.to_json(exclude=["b"])
+        assert x.to_json(fullcopy=True) != json_str
+        assert x.to_json() is not json_str  # least recently used, so dropped
+        assert x.to_dict() == {"a": 1, "b": 2} and x.to_dict() is not x.to_dict()
+        x.to_dict()["a"] = 0
+        assert x.to_list() == [("a", 1), ("b", 2)]
+        x.b = "3"
+        assert x.to_lines(start_from_key="b") == "3"
+        x.b = 3
+        assert x.to_json() == CleverDict({"a": 1, "b": 3}).to_json()
+        x.cache_exports(0)
+        assert x.to_json() is not x.to_json()
+        assert x == CleverDict({"a": 1, "b": 3})
+
+    def test_filter(self):
+        x = CleverDict({"name": "a", "pass word": "p", 1: "one"})
+        public = CleverDict.filter(ignore="pass_word")
+        names = CleverDict.filter(only=["name", 1])
+        for func in "to_json to_dict to_list".split():
+            assert getattr(x, func)(exclude=public) == getattr(x, func)(ignore="pass_word")
+            assert getattr(x, func)(only=names) == getattr(x, func)(only=["name", 1])
+        assert x.info(ignore=public, as_str=True) == x.info(ignore="pass_word", as_str=True)
+        assert public.keys_for(x) is public.keys_for(x)
+        x.age = 1
+        assert public.keys_for(x) == ("name", 1, "age")
+        assert CleverDict.from_json(x.to_json(), only=names) == CleverDict({"name": "a"})
+        assert CleverDict.fromkeys(["a", "name"], 0, only=names) == CleverDict({"name": 0})
+        with pytest.raises(TypeError):
+            x.to_dict(only=names, ignore="name")
+
+    def test_view(self):
+        x = CleverDict({"name": "a", "pass word": "p", 1: "one"})
+        view = x.view(ignore="pass_word")
+        assert isinstance(view, dict) and len(view) == 2 and list(view) == ["name", 1]
+        assert view["_1"] == view._1 == view.get(1) == "one"
+        assert "pass word" not in view and view.get("pass_word", 0) == 0
+        with pytest.raises(KeyError):
+            view["pass word"]
+        x.age = 3
+        assert view == {"name": "a", 1: "one", "age": 3} == dict(view)
+        assert json.dumps(view) == '{"name": "a", "1": "one", "age": 3}'
+        only = x.view(only=CleverDict.filter(only=["age"]))
+        assert json.loads(json.dumps(only, indent=4)) == {"age": 3}
+        for change in (
+            lambda: view.__setitem__("a", 1),
+            lambda: view.update(a=1),
+            lambda: setattr(view, "a", 1),
+            view.clear,
+        ):
+            with pytest.raises(TypeError):
+                change()
+        assert json.dumps(CleverDict().view()) == "{}"
+
+    def test_view_reuses_ignored_keys(self):
+        x = CleverDict({"name": "a", "pass word": "p"})
+        view = x.view(ignore=["pass_word", "secret"])
+        ignored = view._filter.ignored_keys(x)
+        assert view.name == "a" and view._filter.ignored_keys(x) is ignored
+        x.add_alias("name", "secret")
+        assert "name" not in view and len(view) == 0
+
+    def test_bookkeeping_names_are_keys(self):
+        import copy
+
+        data = {"_mutations": 5, "_hash": 1, "save_namespace": "ns", "_lru": [], "b": 2}
+        x = CleverDict(data, maxsize=10)
+        assert x.to_dict() == data and dict(x.to_list()) == data
+        assert CleverDict.from_json(x.to_json()) == CleverDict(x.to_dict()) == CleverDict(data)
+        assert x._hash == 1 and x.save_namespace == "ns" and x.get_version() > 0
+        x["_mutations"] = "abc"
+        assert x._mutations == "abc" and x._vars == {}
+        assert copy.deepcopy(x) == x == eval(repr(x))
+
+    def test_slice_and_positions(self):
+        x = CleverDict.from_lines("zero\none\ntwo\nthree\nfour", start_from_key=0)
+        assert x.position("_2") == 2
+        assert x.slice(1, "_3") == CleverDict({1: "one", 2: "two"})
+        assert x.slice(stop_key=1) == CleverDict({0: "zero"})
+        assert x.to_lines(start_from_key=1, stop_key=3) == "one\ntwo"
+        assert x.to_lines(start_from_key="_1", stop_key=4, ignore="_2") == "one\nthree"
+        x.five = "five"
+        assert x.position("five") == 5
+        del x[0]
+        assert x.position(1) == 0 and x.to_lines(stop_key=2) == "one"
+        with pytest.raises(KeyError):
+            x.slice(0)
+        assert CleverDict().to_lines() == ""
+
+    def test_value_indexes(self):
+        x = CleverDict({"ann": {"age": 30}, "bob": {"age": 25}, "cy": {"age": 30}})
+        x.create_index("age", lambda v: v["age"])
+        assert x.find("age", 30) == ["ann", "cy"] and x.find("age", 99) == []
+        x.dee = {"age": 41}
+        x.bob = {"age": 30}
+        assert x.find("age", 30) == ["ann", "cy", "bob"] and x.find("age", 25) == []
+        assert x.find_range("age", 30, 41) == ["ann", "cy", "bob", "dee"]
+        assert x.find_range("age", low=31) == ["dee"]
+        assert x.top("age", 2) == ["dee", "ann"]
+        assert x.top("age", 1, largest=False) == ["ann"]
+        del x["ann"]
+        x.pop("dee")
+        assert x.find("age", 30) == ["cy", "bob"] and x.top("age", 5) == ["cy", "bob"]
+        x.create_index("size", len)
+        x.fingerprint()
+        before = (x.fingerprint(), x.get_aliases(), x.find("size", 1))
+        for bad in ({"no age": 1}, [{"age": 30}]):
+            with pytest.raises((KeyError, TypeError)):  # nothing changes if an index fails
+                x["e f"] = bad
+            with pytest.raises((KeyError, TypeError)):
+                x.cy = bad
+            assert (x.fingerprint(), x.get_aliases(), x.find("size", 1)) == before
+        with pytest.raises(TypeError):  # indexed values must be hashable
+            x.create_index("raw")
+        x.clear()
+        assert x.find("size", 1) == [] and x.top("age") == []
+        x.drop_index("age")
+        with pytest.raises(KeyError):
+            x.find("age", 30)
+        assert x == CleverDict()
+
+    def test_ttl(self, monkeypatch):
+        import cleverdict.cleverdict as module
+
+        now = [1000.0]
+        monkeypatch.setattr(module, "monotonic", lambda: now[0])
+        deleted = []
+        x = CleverDict({"a": 1}, ttl=10)
+        x.set_autodelete(lambda self, name: deleted.append(name))
+        x.set("b c", 2, ttl=5)
+        x.set("d", 3, ttl=float("inf"))
+        now[0] += 6
+        assert x.get("b_c") is None and "b c" not in x and x.get_aliases() == ["a", "d"]
+        assert x.a == 1 and x.expire() == []
+        now[0] += 5
+        assert not hasattr(x, "a") and x.d == 3
+        x.set("e", 4, ttl=1)
+        x.set("f", 5, ttl=2)
+        x.e = 6  # resets to the default ttl
+        now[0] += 3
+        assert x.expire() == ["f"] and x.e == 6
+        now[0] += 10
+        x.g = 7  # writes delete expired items too
+        assert list(x) == ["d", "g"] and deleted == ["b c", "a", "f", "e"]
+        assert repr(x).endswith(", ttl=10)")
+        y = CleverDict({"h": 1})
+        y.set("h", 2, ttl=1)
+        y.h = 3  # no default ttl, so no expiry
+        now[0] += 2
+        assert y.h == 3 and y["h"] == 3
+
+    def test_expired_items_not_counted_or_exported(self, monkeypatch):
+        import cleverdict.cleverdict as module
+
+        now = [1000.0]
+        monkeypatch.setattr(module, "monotonic", lambda: now[0])
+        for check in (
+            len,
+            lambda x: "b" in x,
+            lambda x: x.to_dict(),
+            lambda x: x.to_json(),
+            lambda x: x.to_list(),
+            lambda x: x.to_lines(),
+            repr,
+        ):
+            x = CleverDict({"a": "1"})
+            x.cache_exports()
+            x.set("b", "2", ttl=1)
+            check(x)
+            now[0] += 2
+            assert check(x) == check(CleverDict({"a": "1"}))
+        x = CleverDict({"a": 1}, ttl=10)
+        x.set("b", 2, ttl=1)
+        x.b = 3  # the default ttl again
+        now[0] += 2
+        assert len(x) == 2 and list(x) == ["a", "b"]
+
+    def test_expire_sweeps_only_expired(self, monkeypatch):
+        import cleverdict.cleverdict as module
+
+        now = [1000.0]
+        monkeypatch.setattr(module, "monotonic", lambda: now[0])
+        x = CleverDict({f"key {i}": i for i in range(1000)}, ttl=100)
+        deleted = []
+        x.set_autodelete(lambda self, name: deleted.append(name))
+        for i in range(10):
+            x.set(f"key {i}", i, ttl=1)
+        expiry, heap = x._state["expiry"]
+        entries = len(heap)
+        now[0] += 2
+        assert x.expire() == deleted == [f"key {i}" for i in range(10)]
+        assert len(heap) == entries - 10 and len(expiry) == 990 and len(x) == 990
+
+    def test_evict_uses_alias_index(self):
+        x = CleverDict({f"key {i}": i for i in range(100)}, maxsize=100)
+        x["new 0"] = 0  # evicts "key 0", indexing the aliases
+        index = x._aliases._by_key
+        for i in range(1, 1000):
+            x[f"new {i}"] = i
+        assert x._aliases._by_key is index and len(index) == len(x) == 100
+        assert len(x._aliases) == 200 and "key_99" not in x._aliases and x.new_999 == 999
+
+    def test_aliases_index(self):
+        x = CleverDict({"a b": 1, 2: "two", True: "yes"})
+        x.add_alias("a b", ["extra", "more"])
+        aliases = x._aliases
+        assert aliases.aliases_of("a b") == ["a b", "a_b", "extra", "more"]
+        x.delete_alias("extra")
+        x.add_alias(2, "deux")
+        x.c = 3
+        assert aliases.aliases_of("a b") == x.get_aliases("a b") == ["a b", "a_b", "more"]
+        assert aliases.aliases_of(2) == x.get_aliases(2)
+        del x["more"]
+        del x[2]
+        assert set(aliases) == {True, "_1", "_True", "c"} and aliases.aliases_of(2) == []
+        assert aliases.aliases_of(True) == [True, "_1", "_True"]
+        aliases.update(z="c")
+        assert aliases._by_key is None and aliases.aliases_of("c") == ["c", "z"]
+        x.clear()
+        assert aliases == {} and aliases.aliases_of("c") == []
+
+    def test_lru(self):
+        deleted = []
+        x = CleverDict({"a": 1, "b c": 2, "d": 3}, maxsize=3)
+        x.set_autodelete(lambda self, name: deleted.append(name))
+        assert x.a == 1 and x.get("b_c") == 2  # "d" is now least recently used
+        x.e = 4
+        assert list(x) == ["a", "b c", "e"] and deleted == ["d"]
+        x["a"] = 5
+        x.f = 6
+        assert list(x) == ["a", "e", "f"] and deleted == ["d", "b c"]
+        assert x.get_aliases() == ["a", "e", "f"]
+        assert repr(x).endswith(", maxsize=3, max_bytes=None)")
+        del x.e
+        x.g = 7
+        assert len(x) == 3 and deleted == ["d", "b c", "e"]
+        x.clear()
+        x.update({"h": 1, "i": 2, "j": 3, "k": 4})
+        assert list(x) == ["i", "j", "k"]
+        assert CleverDict(x)._state["lru"][1] == 3
+        y = CleverDict(max_bytes=500)
+        for i in range(20):
+            y[i] = "x" * 50
+        assert 1 < len(y) < 20 and list(y)[-1] == 19
+        y.big = "x" * 1000  # kept even though it's over max_bytes
+        assert list(y) == ["big"]
+
+    def test_freeze_and_thaw(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        x = CleverDict({"a b": 1, 2: "two"}, ttl=60, maxsize=10)
+        x.add_alias("a b", "ab")
+        x.setattr_direct("note", "kept")
+        f = x.freeze()
+        assert isinstance(f, FrozenCleverDict) and f.items() == x.items()
+        assert f.ab == f["a_b"] == 1 and f._2 == "two" and f.note == "kept"
+        assert "expiry" not in f._state and "lru" not in f._state
+        assert f.freeze() is f and f.copy() is f
+        assert hash(f) == hash(x.freeze()) and f._state["hash"] == hash(f)
+        assert {f: "cached"}[x.freeze()] == "cached"
+        assert eval(repr(f)) == f
+        for mutate in (
+            lambda: setattr(f, "c", 3),
+            lambda: f.__setitem__("ab", 3),
+            lambda: delattr(f, "ab"),
+            lambda: f.__delitem__(2),
+            lambda: f.update(c=3),
+            lambda: f.pop("ab"),
+            lambda: f.setdefault("c"),
+            lambda: f.clear(),
+            lambda: f.add_alias(2, "deux"),
+            lambda: f.delete_alias("ab"),
+            lambda: f.setattr_direct("note", "changed"),
+            lambda: f.autosave(),
+        ):
+            with pytest.raises(TypeError):
+                mutate()
+        assert f.to_dict() == {"a b": 1, 2: "two"} and f.get_aliases("a b") == ["a b", "a_b", "ab"]
+        f.cache_exports()
+        assert f.to_json() is f.to_json()
+        with ThreadPoolExecutor(4) as pool:
+            assert set(pool.map(lambda i: (f.ab, f[2], hash(f)), range(100))) == {
+                (1, "two", hash(f))
+            }
+        t = f.thaw()
+        assert type(t) is CleverDict and t == f and t._aliases is not f._aliases
+        t.ab = 5
+        t.c = 3
+        assert f.ab == 1 and "c" not in f and t.note == "kept"
+        with pytest.raises(TypeError):
+            hash(CleverDict(a=[1]).freeze())
+
+    def test_freeze_pickle_and_deepcopy(self):
+        import copy
+        import pickle
+
+        x = CleverDict({"a b": 1, 2: (3, 4)}, normaliser="snake_case")
+        x.add_alias("a b", "ab")
+        x.setattr_direct("note", "kept")
+        f = x.freeze()
+        assert copy.deepcopy(f) is f and copy.copy(f) is f
+        g = pickle.loads(pickle.dumps(f))
+        assert type(g) is FrozenCleverDict and g == f and hash(g) == hash(f)
+        assert g.ab == g.a_b == 1 and g._2 == (3, 4) and g.note == "kept"
+        assert g._state["normaliser"] is x._state["normaliser"]
+        with pytest.raises(TypeError):
+            g.c = 1
+
+    def test_shared_memory(self):
+        import pickle
+
+        name = f"cd_test_{os.getpid()}"
+        x = CleverDict({"Patient Name": "Joe", 1: [1, 2], "b": {"c": None}})
+        published = x.publish(name)
+        shared = SharedCleverDict.attach(name)
+        try:
+            assert list(shared) == ["Patient Name", 1, "b"] and len(shared) == 3
+            assert shared.Patient_Name == "Joe" and shared["Patient Name"] == "Joe"
+            assert shared[1] == shared._1 == shared._True == shared[True] == [1, 2]
+            assert shared.get_key("_1") == 1 and "b" in shared and "c" not in shared
+            assert shared.get("c", 0) == 0 and shared.to_dict() == x.to_dict() == dict(shared)
+            with pytest.raises(AttributeError):
+                shared.c
+            with pytest.raises(TypeError):
+                shared.b = 5
+            x.b = 5
+            del x[1]
+            x.publish(name)
+            assert shared.b == 5 and 1 not in shared and shared.get_version() == 2
+            assert pickle.loads(pickle.dumps(published)).to_dict() == {
+                "Patient Name": "Joe",
+                "b": 5,
+            }
+        finally:
+            shared.unlink()
+        with pytest.raises(FileNotFoundError):
+            SharedCleverDict.attach(name)
+
+    def test_shared_memory_plain_dict(self):
+        name = f"cd_test_plain_{os.getpid()}"
+        SharedCleverDict.publish({"a": 1, 2: "two"}, name)
+        shared = SharedCleverDict.attach(name)
+        try:
+            assert len(shared) == 2 and list(shared) == ["a", 2]
+            assert shared["a"] == shared.a == 1 and "a" in shared and shared[2] == "two"
+            assert shared.get_key(2) == 2 and "_2" not in shared
+        finally:
+            shared.unlink()
+
+    def test_attribute_misses(self):
+        """Misses raise one AttributeError, without a chained KeyError"""
+        x = CleverDict({"a": 1})
+        assert hasattr(x, "a")
+        assert not hasattr(x, "b")
+        assert getattr(x, "b", "default") == "default"
+        with pytest.raises(AttributeError) as e:
+            x.b
+        assert str(e.value) == "'b'"
+        assert e.value.__context__ is None
+        assert isinstance(x._aliases, dict)
+
+        class Early(CleverDict):
+            def __init__(self):
+                self.setattr_direct("probe", hasattr(self, "anything"))
+                super().__init__()
+
+        assert Early().probe is False
+
     def test_conversions(self):
         x = CleverDict({1: "First Entry", " ": "space", "??": "question"})
         assert x._1 == "First Entry"
@@ -1062,6 +1571,244 @@ class Test_Save_Functionality:
             ("_4", 10),
         ]
 
+    def test_write_paths_switch(self):
+        """
+        Hooks and direct attributes added after creation change the write
+        path immediately; with no hooks the (no-op) save isn't called at all.
+        """
+        log = []
+        x = CleverDict({"a": 1})
+        x.a = 2
+        x.set_autosave(lambda self, name, value: log.append((name, value)))
+        x.a = 3
+        x.setattr_direct("direct", 0)
+        x.direct = 4
+        assert "direct" not in x and x.direct == 4
+        assert log == [("a", 3), ("direct", 0), ("direct", 4)]
+        with Expand(False):
+            x.b_c = 5
+        x["b-d"] = 6
+        assert x.get_aliases("b_c") == ["b_c"]
+        assert x.get_aliases("b-d") == ["b-d", "b_d"]
+
+    def test_autosave_to_database(self, tmpdir):
+        from concurrent.futures import ThreadPoolExecutor
+
+        path = Path(tmpdir) / "store.db"
+        x = CleverDict({"a": 1, 2: [3]})
+        x.autosave(database=path, namespace="x", silent=True)
+        y = CleverDict({"a": "other"})
+        y.autosave(database=path, namespace="y", silent=True)
+        x.a = 5
+        x["b c"] = {"d": None}
+        del x[2]
+        with x.batch():
+            x.update(e=6, f=7)
+            del x.e
+        store = SQLiteStore.open(path)
+        assert x._state["store"] is store and x.save_path == path.resolve()
+        assert sorted(store.namespaces()) == ["x", "y"]
+        assert store.load("x") == {"a": 5, "b c": {"d": None}, "f": 7}
+        z = CleverDict.load("x", database=path)
+        assert z.to_dict() == {"a": 5, "b c": {"d": None}, "f": 7} and z.b_c == {"d": None}
+        z.g = 8
+        z.setattr_direct("note", "not an item")
+        z.setattr_direct("unsaveable", {1, 2})
+        z.note = "changed"
+        assert list(store.load("x")) == ["a", "b c", "f", "g"]
+        d = DiskCleverDict.open("x", database=path)
+        d.setattr_direct("note", object())
+        assert "note" not in CleverDict.load("x", database=path)
+        assert CleverDict.load("y", database=path).to_dict() == {"a": "other"}
+        with ThreadPoolExecutor(4) as pool:  # the shared connection works from any thread
+            list(pool.map(lambda i: z.__setitem__(f"t{i}", i), range(20)))
+            with z.batch():
+                z.in_batch = True
+                pool.submit(z.__setitem__, "waits", True)
+                assert "waits" not in store.load("x")
+        assert store.load("x")["t19"] == 19 and store.load("x")["waits"]
+        assert "store" not in x._vars and "save_namespace" not in x.to_json(fullcopy=True)
+        x.autosave("off", silent=True)
+        x.h = 9
+        assert "h" not in store.load("x") and "store" not in x._state
+        with pytest.raises(ValueError):
+            x.autosave(fullcopy=True, database=path)
+        store.close()
+
+    def test_autosave_lock_merges(self, tmpdir):
+        import multiprocessing
+
+        path = Path(tmpdir) / "shared.json"
+        x = CleverDict({"a": 1, 2: "two"})
+        y = CleverDict({"b": 1})
+        x.autosave(lock=True, save_path=path, silent=True)
+        y.autosave(lock=True, save_path=path, silent=True)
+        x.a = 5
+        y.c = 6
+        del x[2]
+        x.setattr_direct("note", "not an item")
+        x.note = "changed"
+        assert json.loads(get_data(path)) == {"a": 5, "b": 1, "c": 6}
+        assert not path.with_name("shared.json.lock").read_bytes()
+        with pytest.raises(ValueError):
+            x.autosave(fullcopy=True, lock=True)
+        if "fork" not in multiprocessing.get_all_start_methods():
+            return
+
+        def worker(n):
+            z = CleverDict()
+            z.autosave(lock=True, save_path=path, silent=True)
+            for i in range(20):
+                z[f"worker{n}_{i}"] = i
+
+        context = multiprocessing.get_context("fork")
+        processes = [context.Process(target=worker, args=(n,)) for n in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        assert len(json.loads(get_data(path))) == 3 + 4 * 20
+
+    def test_watch_and_poll(self, tmpdir):
+        import time
+
+        path = Path(tmpdir) / "watched.json"
+        path.write_text(json.dumps({"a": 1, "b c": 2, "d": 3}))
+        x = CleverDict.from_json(file_path=path)
+        log = []
+        x.set_autosave(lambda self, name, value: log.append((name, value)))
+        x.set_autodelete(lambda self, name: log.append(name))
+        x.watch(path)
+        assert x.poll() == []
+        x.local = "kept"
+        path.write_text(json.dumps({"a": 1, "b c": 5, "e": 6}))
+        os.utime(path, ns=(0, 1))  # in case the size and mtime are unchanged
+        assert x.poll() == ["b c", "e", "d"] and x.poll() == []
+        assert x.to_dict() == {"a": 1, "b c": 5, "local": "kept", "e": 6}
+        assert log == [("local", "kept"), ("b c", 5), ("e", 6), "d"]
+        path.write_text('{"a": ')  # half written
+        assert x.poll() == [] and x.a == 1
+        x.unwatch()
+        path.write_text(json.dumps({"a": 1}))
+        x.watch(path, interval=0.01)
+        path.write_text(json.dumps({"a": 7}))
+        os.utime(path, ns=(0, 2))
+        for _ in range(200):
+            if x.a == 7:
+                break
+            time.sleep(0.01)
+        x.unwatch()
+        assert x.a == 7 and "watch" not in x._state
+
+    def test_poll_int_keys(self, tmpdir):
+        path = Path(tmpdir) / "watched.json"
+        x = CleverDict({1: "one", 2: "two", 1.5: "half", None: "none"})
+        x.to_json(file_path=path)
+        x.watch(path)
+        path.write_text(json.dumps({"1": "ONE", "1.5": "HALF", "null": "none", "3": "three"}))
+        os.utime(path, ns=(0, 1))
+        assert x.poll() == [1, 1.5, "3", 2] and x.poll() == []
+        assert x.to_dict() == {1: "ONE", 1.5: "HALF", None: "none", "3": "three"}
+        fails = [OSError("disk full")]
+
+        def save(self, name, value):
+            if fails:
+                raise fails.pop()
+
+        x.set_autosave(save)
+        data = {"1": "again", "1.5": "HALF", "null": "none", "3": "three", "4": 4}
+        path.write_text(json.dumps(data))
+        os.utime(path, ns=(0, 2))
+        with pytest.raises(OSError):
+            x.poll()
+        assert x.poll() == ["4"] and x[1] == "again" and x.poll() == []
+
+    def test_watch_thread_reports_errors(self, tmpdir):
+        import time
+
+        path = Path(tmpdir) / "watched.json"
+        path.write_text(json.dumps({"a": 1}))
+        x = CleverDict.from_json(file_path=path)
+        errors = []
+        x.set_autosave(lambda self, name, value: 1 / (value != 2))
+        x.watch(path, interval=0.01, on_error=errors.append)
+        path.write_text(json.dumps({"a": 2}))
+        os.utime(path, ns=(0, 1))
+        for _ in range(200):
+            if errors:
+                break
+            time.sleep(0.01)
+        x.set_autosave()
+        path.write_text(json.dumps({"a": 3}))
+        os.utime(path, ns=(0, 2))
+        for _ in range(200):
+            if x.a == 3:
+                break
+            time.sleep(0.01)
+        x.unwatch()
+        assert isinstance(errors[0], ZeroDivisionError) and x.a == 3
+
+    def test_compression(self, tmpdir):
+        import gzip
+
+        x = CleverDict({"a": 1, "b c": "x" * 1000, "2": [1, 2]})
+        for compression in ("gzip", "bz2", "lzma"):
+            path = Path(tmpdir) / f"data.{compression}"
+            x.to_json(file_path=path, compression=compression)
+            assert path.stat().st_size < 200
+            assert CleverDict.from_json(file_path=path) == x
+            data = x.to_json(compression=compression)
+            assert isinstance(data, bytes) and CleverDict.from_json(data) == x
+            lines = CleverDict.from_lines("BZh\none\ntwo")
+            lines.to_lines(file_path=path, compression=compression)
+            assert CleverDict.from_lines(file_path=path) == lines
+            assert CleverDict.from_lines(lines.to_lines(compression=compression)) == lines
+        lines.to_lines(file_path=path)
+        assert CleverDict.from_lines(file_path=path) == lines
+        with pytest.raises(ValueError):
+            x.to_json(compression="zip")
+        x.autosave(save_path=Path(tmpdir) / "auto.json", compression="gzip", silent=True)
+        assert x.save_path.name == "auto.json.gz" and x._state["compression"] == "gzip"
+        x.d = 4
+        assert json.loads(gzip.decompress(x.save_path.read_bytes()))["d"] == 4
+        y = CleverDict.from_json(file_path=x.save_path)
+        y.watch(x.save_path)
+        x.e = 5
+        os.utime(x.save_path, ns=(0, 1))
+        assert y.poll() == ["e"]
+        x.autosave(lock=True, save_path=x.save_path, compression="lzma", silent=True)
+        x.f = 6
+        assert x.save_path.name == "auto.json.xz"
+        assert CleverDict.from_json(file_path=x.save_path).f == 6
+        x.autosave(save_path=x.save_path, silent=True)
+        assert x.save_path.name == "auto.json" and "compression" not in x._state
+        x.autosave("off", silent=True)
+
+    def test_disk_cleverdict(self, tmpdir):
+        path = Path(tmpdir) / "store.db"
+        x = CleverDict({i: {"n": i} for i in range(10)})
+        x["Big Key"] = "big"
+        x.autosave(database=path, namespace="data", silent=True)
+        d = DiskCleverDict.open("data", database=path, cache_size=3)
+        assert len(d) == 11 and list(d)[-1] == "Big Key"
+        assert set(dict.values(d)) == {_unloaded}  # nothing read yet
+        assert d[1] == {"n": 1} and d._1 == {"n": 1} and d.get("Big_Key") == "big"
+        assert d[0] == {"n": 0} and d.get(2) == {"n": 2}
+        assert dict.__getitem__(d, 1) is _unloaded  # least recently used
+        assert sum(v is not _unloaded for v in dict.values(d)) == 3
+        d.new = [1, 2]
+        del d[3]
+        d[4] = "four"
+        assert SQLiteStore.open(path).load("data")[4] == "four"
+        e = DiskCleverDict.open("data", database=path, cache_size=None)
+        assert e.to_dict() == d.to_dict() == dict(d) and 3 not in e and e.new == [1, 2]
+        assert json.loads(json.dumps(d))["Big Key"] == "big"
+        assert d.pop(5) == {"n": 5} and d.setdefault(6) == {"n": 6}
+        assert DiskCleverDict.open("data", database=path).to_list() == d.to_list()
+        with pytest.raises(AttributeError):
+            d.missing
+        SQLiteStore.open(path).close()
+
 
 class Test_Delete_Functionality:
     def test_delete_on_creation1(self):
@@ -1092,6 +1839,146 @@ class Test_Delete_Functionality:
         assert x.delete.__name__ == "delete"
 
 
+class Test_Normaliser:
+    def test_snake_case_merges_headers(self):
+        x = CleverDict({"Order-ID": 1, "customerName": "a", 2: "two"}, normaliser="snake_case")
+        assert x.order_id == 1 and x.customer_name == "a" and x._2 == "two"
+        x["ORDER_ID"] = 2
+        x["order id"] = 3
+        assert list(x.keys()) == ["Order-ID", "customerName", 2]
+        assert x["Order-ID"] == x.ORDER_ID == 3
+
+    def test_per_class_and_custom_policies(self):
+        class Headers(CleverDict):
+            normaliser = ("casefold", lambda name: f"col_{name}" if name == "X" else None)
+
+        x = Headers({"ABC": 1, "X": 2})
+        x["abc"] = 3
+        assert x == Headers({"ABC": 3, "X": 2})
+        assert x.get_aliases("X") == ["X", "x", "col_X"]
+        assert CleverDict({"ABC": 1}).get_aliases("ABC") == ["ABC"]
+        with pytest.raises(ValueError):
+            Normaliser("kebab_case")
+
+    def test_compiled_once_and_copied(self):
+        assert Normaliser.compile("snake_case") is Normaliser.compile(["snake_case"])
+        x = CleverDict({"A b": 1}, normaliser="snake_case")
+        assert eval(repr(x)) == x == CleverDict(x)
+        assert "_normaliser" not in x.to_json(fullcopy=True)
+        hits = Normaliser.compile("snake_case").aliases.cache_info().hits
+        CleverDict({"A b": 2}, normaliser="snake_case")
+        assert Normaliser.compile("snake_case").aliases.cache_info().hits == hits + 1
+
+    def test_compiled_registry_is_bounded(self):
+        snake = Normaliser.compile("snake_case")
+        for i in range(Normaliser.compiled_maxsize * 2):
+            Normaliser.compile(lambda name, i=i: f"{name}{i}")
+            assert Normaliser.compile("snake_case") is snake
+        assert len(Normaliser._compiled) <= Normaliser.compiled_maxsize
+
+
+class Test_Instrumentation:
+    def test_disabled_by_default(self):
+        assert CleverDict.instrumentation is None
+        x = CleverDict({"a": 1})
+        x.a
+        assert CleverDict.disable_instrumentation() is None
+
+    def test_counts_and_histograms(self):
+        stats = CleverDict.enable_instrumentation()
+        try:
+            x = CleverDict({"a": 1})
+            x.b = 2
+            x.a
+            with pytest.raises(AttributeError):
+                x.c
+            del x.b
+            data = stats.to_dict()
+        finally:
+            assert CleverDict.disable_instrumentation() is stats
+        counters = {
+            (metric, tuple(sample["labels"].items())): sample["value"]
+            for metric, samples in data["counters"].items()
+            for sample in samples
+        }
+        assert counters[("hook_calls", (("hook", "save"), ("label", "CleverDict")))] == 2
+        assert counters[("hook_calls", (("hook", "delete"), ("label", "CleverDict")))] == 1
+        assert counters[("alias_misses", (("label", "CleverDict"),))] == 1
+        assert counters[("all_aliases_calls", ())] == 2
+        save_times = data["histograms"]["hook_seconds"][0]
+        assert save_times["count"] == save_times["buckets"]["+Inf"]
+
+    def test_io_label_and_prometheus(self, tmpdir):
+        stats = CleverDict.enable_instrumentation(label=lambda x: x.get("tenant", "?"))
+        try:
+            x = CleverDict({"tenant": "acme"})
+            x.to_json(file_path=Path(tmpdir) / "x.json")
+            CleverDict.from_json(file_path=Path(tmpdir) / "x.json")
+            text = stats.to_prometheus()
+        finally:
+            CleverDict.disable_instrumentation()
+        size = (Path(tmpdir) / "x.json").stat().st_size
+        assert "# TYPE cleverdict_to_json_seconds histogram" in text
+        assert 'cleverdict_to_json_seconds_count{label="acme"} 1' in text
+        assert 'cleverdict_from_json_seconds_count{label="CleverDict"} 1' in text
+        assert "# TYPE cleverdict_bytes_written_total counter" in text
+        assert f'cleverdict_bytes_written_total{{label="acme",operation="to_json"}} {size}' in text
+
+    def test_prometheus_escapes_labels(self):
+        stats = CleverDict.enable_instrumentation(label=lambda x: 'ten"ant\\\nx')
+        try:
+            CleverDict({"a": 1}).a
+            text = stats.to_prometheus()
+        finally:
+            CleverDict.disable_instrumentation()
+        assert 'cleverdict_alias_hits_total{label="ten\\"ant\\\\\\nx"} 1\n' in text
+        assert all(line.startswith(("# TYPE ", "cleverdict_")) for line in text.splitlines())
+
+    def test_slow_hook_warning(self):
+        CleverDict.enable_instrumentation(slow_hook=0)
+        try:
+            x = CleverDict()
+            with pytest.warns(RuntimeWarning, match="slow save hook"):
+                x.a = 1
+        finally:
+            CleverDict.disable_instrumentation()
+
+
+class Test_Benchmarks:
+    def test_bench_core_smoke(self):
+        """The benchmark suite runs and produces one record per benchmark"""
+        from benchmarks import bench_core
+
+        results = bench_core.run([10], repeat=1, verbose=False)
+        names = {(r["name"], r["impl"]) for r in results}
+        assert ("delete", "CleverDict") in names
+        assert ("construct", "SimpleNamespace") in names
+        assert all(r["per_unit"] >= 0 for r in results)
+
+    def test_bench_core_selected(self):
+        from benchmarks import bench_core
+
+        results = bench_core.run([100], repeat=1, verbose=False, names={"evict", "expire"})
+        assert {r["name"] for r in results} == {"evict", "expire"}
+
+    def test_bench_persistence_smoke(self, tmpdir):
+        from benchmarks import bench_persistence
+
+        results = bench_persistence.run([10], tmpdir, repeat=1, soak_mutations=20, verbose=False)
+        by_name = {(r["name"], json.dumps(r["params"])): r for r in results}
+        assert by_name[("autosave", '{"fullcopy": true}')]["unit"] == "s"
+        assert by_name[("autosave_bytes", '{"fullcopy": false}')]["per_unit"] > 0
+        assert ("soak_growth", '{"fullcopy": false, "mutations": 20}') in by_name
+        assert any(Path(tmpdir).glob("autosave-*.json"))
+
+    def test_import_defers_modules(self):
+        """Heavy modules are only imported when first used (the time budget is checked by
+        python -m benchmarks.bench_import)"""
+        from benchmarks import bench_import
+
+        assert bench_import.loaded_modules() == []
+
+
 class Test_README_examples:
     def test_BASIC_USE_1(self):
         x = CleverDict({"total": 6, "usergroup": "Knights of Ni"})